@@ -0,0 +1,53 @@
+# benchmark_harvest.py
+# Times harvesting many documents one by one vs. with harvest_batch.
+import argparse
+import random
+import time
+from pathlib import Path
+
+from data_harvesters import harvest_all_data, harvest_batch
+
+WORDS = [
+    "the", "paper", "jam", "fuser", "unit", "replace", "firmware", "version", "error", "code", "tray", "feeder",
+    "KM-2540", "KM-3050", "FS-1020DN", "M3655idn", "M3655idnf", "P3045dn", "DP", "Vi2", "Device Manager",
+    "302NL93050", "Rev. 2", "Service Bulletin", "English",
+]
+
+
+def sample_documents(count, words=300, seed=1):
+    """Builds count bulletin-like texts so the benchmark runs without a corpus."""
+    rng = random.Random(seed)
+    return [(f"QA_{n:06d}", " ".join(rng.choice(WORDS) for _ in range(words))) for n in range(count)]
+
+
+def load_documents(folder, count):
+    """Reads up to count .txt files from folder, repeating them to reach count."""
+    files = sorted(Path(folder).glob("*.txt"))
+    if not files:
+        raise SystemExit(f"No .txt files in {folder}")
+    texts = [(f.stem, f.read_text(encoding="utf-8", errors="replace")) for f in files]
+    return [texts[n % len(texts)] for n in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scalar vs. batch harvesting")
+    parser.add_argument("folder", nargs="?", help="Folder of extracted .txt files (generated texts are used if omitted)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--no-check", action="store_true", help="Skip comparing the batch rows with the scalar rows")
+    args = parser.parse_args()
+
+    print(f"{'documents':>10}{'scalar s':>10}{'batch s':>10}{'speedup':>9}{'same':>6}")
+    for size in args.sizes:
+        documents = load_documents(args.folder, size) if args.folder else sample_documents(size)
+        start = time.perf_counter()
+        rows = [harvest_all_data(text, qa_number) for qa_number, text in documents]
+        scalar = time.perf_counter() - start
+        start = time.perf_counter()
+        batch = harvest_batch(documents)
+        batched = time.perf_counter() - start
+        same = "-" if args.no_check else ("yes" if batch.to_dict("records") == rows else "NO")
+        print(f"{size:>10}{scalar:>10.2f}{batched:>10.2f}{scalar / batched:>8.1f}x{same:>6}")
+
+
+if __name__ == "__main__":
+    main()
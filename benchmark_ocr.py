@@ -0,0 +1,79 @@
+# benchmark_ocr.py
+# Times how pages are turned into images for Tesseract, old path vs. current path.
+import argparse
+import io
+import time
+import tracemalloc
+from pathlib import Path
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+import ocr_utils
+
+
+def render_png_roundtrip(page, dpi):
+    """The original path: RGB render, PNG encode, PNG decode."""
+    pix = page.get_pixmap(dpi=dpi)
+    img = Image.open(io.BytesIO(pix.tobytes()))
+    img.load()
+    return img
+
+
+def render_direct(page, dpi):
+    """The current path: grayscale render wrapped straight into a PIL image."""
+    return ocr_utils._render_page(page, dpi)
+
+
+def _image_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+
+def measure(render, pdf_document, dpi, repeat):
+    """
+    Returns (seconds per page, peak traced bytes, image bytes) for one render
+    path. Traced bytes only cover Python allocations such as the PNG buffer;
+    the decoded bitmap lives in PIL and is reported as image bytes.
+    """
+    pages = [pdf_document.load_page(i) for i in range(len(pdf_document))]
+    image_bytes = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            img = render(page, dpi)
+            image_bytes = max(image_bytes, _image_bytes(img))
+            del img
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / (repeat * len(pages)), peak, image_bytes
+
+
+def sample_document(pages=3):
+    """Builds a small text-heavy PDF so the benchmark runs without sample files."""
+    pdf_document = fitz.open()
+    for n in range(pages):
+        page = pdf_document.new_page()
+        for line in range(50):
+            page.insert_text((50, 60 + line * 14), f"Page {n + 1} line {line + 1}: TASKalfa 3554ci service bulletin KM-{n}{line}")
+    return pdf_document
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page rendering for OCR")
+    parser.add_argument("pdf", nargs="?", help="PDF to render (a generated sample is used if omitted)")
+    parser.add_argument("--dpi", type=int, default=ocr_utils.OCR_DPI)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pdf_document = fitz.open(Path(args.pdf)) if args.pdf else sample_document()
+    print(f"Rendering {len(pdf_document)} pages at {args.dpi} DPI, {args.repeat} passes each\n")
+    print(f"{'path':<16}{'ms/page':>10}{'peak traced MB':>16}{'image MB':>10}")
+    for name, render in (("png round-trip", render_png_roundtrip), ("direct gray", render_direct)):
+        per_page, peak, image_bytes = measure(render, pdf_document, args.dpi, args.repeat)
+        print(f"{name:<16}{per_page * 1000:>10.1f}{peak / 2**20:>16.1f}{image_bytes / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmark_preprocessing.py
+# Measures image preprocessing steps and their effect on OCR time and harvest hits.
+import argparse
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import numpy as np
+
+import ocr_utils
+from data_harvesters import harvest_all_data
+from image_preprocessing import STEPS, preprocess, preprocess_image, validate_steps
+
+
+def load_pages(pdf_paths, max_pages):
+    """Renders the first max_pages pages of every PDF the way the OCR path does."""
+    documents = []
+    for pdf_path in pdf_paths:
+        pdf_document = fitz.open(pdf_path)
+        pages = [ocr_utils._render_page(pdf_document.load_page(n)) for n in range(min(max_pages, len(pdf_document)))]
+        documents.append((pdf_path, pages))
+    return documents
+
+
+def step_costs(documents, steps):
+    """Returns average milliseconds per page for every step, run in order."""
+    timings = {}
+    page_count = 0
+    for _, pages in documents:
+        for img in pages:
+            preprocess(np.asarray(img), steps, timings)
+            page_count += 1
+    return {name: timings.get(name, 0.0) / max(page_count, 1) * 1000 for name in steps}
+
+
+def ocr_run(documents, steps):
+    """OCRs every page; returns (seconds, documents whose text yields models)."""
+    start = time.perf_counter()
+    hits = 0
+    for pdf_path, pages in documents:
+        text = "\n".join(ocr_utils._ocr_image(preprocess_image(img, steps), pdf_path.name)[0] for img in pages)
+        if harvest_all_data(text, pdf_path.stem).get("models"):
+            hits += 1
+    return time.perf_counter() - start, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image preprocessing before OCR")
+    parser.add_argument("folder", help="Folder of scanned PDFs")
+    parser.add_argument("--steps", default=",".join(STEPS), help="Comma-separated steps to measure, in order")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per PDF")
+    args = parser.parse_args()
+
+    steps = validate_steps([s.strip() for s in args.steps.split(",") if s.strip()])
+    pdf_paths = sorted(Path(args.folder).rglob("*.pdf"))
+    documents = load_pages(pdf_paths, args.pages)
+    page_count = sum(len(pages) for _, pages in documents)
+    print(f"{len(documents)} PDFs, {page_count} pages rendered at {ocr_utils.OCR_DPI} DPI\n")
+
+    print(f"{'step':<16}{'ms/page':>10}")
+    for name, ms in step_costs(documents, steps).items():
+        print(f"{name:<16}{ms:>10.1f}")
+
+    if not ocr_utils.TESSERACT_AVAILABLE:
+        print("\nTesseract not found; skipping the OCR comparison.")
+        return
+    print(f"\n{'pipeline':<32}{'OCR s':>8}{'docs with models':>18}")
+    for label, run_steps in (("none", []), (",".join(steps), steps)):
+        seconds, hits = ocr_run(documents, run_steps)
+        print(f"{label:<32}{seconds:>8.1f}{hits:>12}/{len(documents)}")
+
+
+if __name__ == "__main__":
+    main()
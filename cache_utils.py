@@ -0,0 +1,247 @@
+# cache_utils.py
+# Persistent, content-addressed caches stored under config.CACHE_DIR
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from config import CACHE_DIR, EXTRACTION_CACHE_MAX_BYTES, OCR_CACHE_MAX_BYTES
+
+logger = logging.getLogger("app.cache")
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+# Eviction trims the cache to this share of max_bytes so the next writes do not evict again.
+_EVICT_TO = 0.9
+
+
+def hash_bytes(data: bytes) -> str:
+    """Returns the SHA-256 hex digest of the given bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    """Returns the SHA-256 hex digest of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(content_hash: str, settings: dict) -> str:
+    """Combines a content hash with the settings that shaped the cached value."""
+    settings_blob = json.dumps(settings, sort_keys=True)
+    return hash_bytes(f"{content_hash}:{settings_blob}".encode('utf-8'))
+
+
+class DiskCache:
+    """
+    A size-bounded key/value store with one JSON file per entry.
+    Entries are sharded by key prefix; reads refresh an entry's mtime so the
+    least recently used files are evicted first once max_bytes is exceeded,
+    down to 90% of it. A running size total means the directory is only
+    scanned on the first write and when evicting.
+    Several processes and threads may share a directory: writes are atomic
+    renames and a missing file is simply treated as a miss.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size_estimate = None
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        """Returns the cached value for key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value) -> None:
+        """Stores a JSON-serialisable value, evicting old entries if needed."""
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            tmp_size = tmp_path.stat().st_size
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key[:12]}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            if self._size_estimate is None:
+                self._size_estimate = self._current_size()
+            else:
+                self._size_estimate += tmp_size - replaced
+            if self._size_estimate > self.max_bytes:
+                self.evict()
+
+    def _iter_entries(self):
+        if not self.directory.exists():
+            return
+        for path in self.directory.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            yield path, stat
+
+    def _current_size(self) -> int:
+        return sum(stat.st_size for _, stat in self._iter_entries())
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the cache is within 90% of max_bytes. Returns the count removed."""
+        entries = sorted(self._iter_entries(), key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        target = self.max_bytes * _EVICT_TO if total > self.max_bytes else self.max_bytes
+        removed = 0
+        for path, stat in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= stat.st_size
+            removed += 1
+        self._size_estimate = total
+        if removed:
+            logger.info(f"Evicted {removed} entries from cache at {self.directory}")
+        return removed
+
+
+_extraction_cache = None
+
+
+def get_extraction_cache() -> DiskCache:
+    """Returns the per-process cache of extracted PDF text."""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = DiskCache(CACHE_DIR / 'extracted_text', EXTRACTION_CACHE_MAX_BYTES)
+    return _extraction_cache
+
+
+_ocr_cache = None
+
+
+def get_ocr_cache() -> DiskCache:
+    """Returns the per-process cache of OCR results keyed by page bitmap."""
+    global _ocr_cache
+    if _ocr_cache is None:
+        _ocr_cache = DiskCache(CACHE_DIR / 'ocr_pages', OCR_CACHE_MAX_BYTES)
+    return _ocr_cache
+
+
+class FileManifest:
+    """
+    Remembers the harvested row of every file in an input folder together
+    with its size, mtime and content hash, so an incremental run only
+    re-extracts files that are new or changed. The whole manifest is
+    discarded when the fingerprint (patterns and extractor settings) differs.
+    """
+
+    def __init__(self, path: Path, fingerprint: str):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.entries = {}
+        self._seen = set()
+        self._load()
+
+    @classmethod
+    def for_folder(cls, folder: Path, fingerprint: str) -> "FileManifest":
+        """Returns the manifest kept in CACHE_DIR for the given input folder."""
+        folder_key = hash_bytes(str(Path(folder).resolve()).encode('utf-8'))[:16]
+        return cls(CACHE_DIR / 'manifests' / f"{folder_key}.json", fingerprint)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("fingerprint") != self.fingerprint:
+            logger.info("Patterns or extractor settings changed; ignoring previous manifest.")
+            return
+        self.entries = data.get("files", {})
+
+    def lookup(self, rel_path: str, file_path: Path):
+        """
+        Returns the stored row if the file is unchanged, else None.
+        Size and mtime are compared first; the content hash is only read when
+        they differ, so a re-synced but identical file is still reused. A file
+        that cannot be read (e.g. removed since the folder was listed) is a
+        miss, left to fail when it is processed.
+        """
+        entry = self.entries.get(rel_path)
+        if not entry:
+            return None
+        try:
+            stat = file_path.stat()
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                self._seen.add(rel_path)
+                return entry["row"]
+            unchanged = entry["size"] == stat.st_size and entry["sha256"] == hash_file(file_path)
+        except OSError as e:
+            logger.warning(f"Could not check {rel_path} against the manifest: {e}")
+            return None
+        if unchanged:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._seen.add(rel_path)
+            return entry["row"]
+        return None
+
+    def record(self, rel_path: str, file_path: Path, content_hash: str, row: dict):
+        """Stores the harvested row for a freshly processed file; a file that is gone is not recorded."""
+        try:
+            stat = file_path.stat()
+            sha256 = content_hash or hash_file(file_path)
+        except OSError as e:
+            logger.warning(f"Not recording {rel_path} in the manifest: {e}")
+            return
+        self.entries[rel_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "row": row,
+        }
+        self._seen.add(rel_path)
+
+    def save(self, prune: bool = True):
+        """
+        Writes the manifest. With prune, files that were not part of this run
+        are dropped; an unfinished run passes prune=False so the files it
+        never reached keep their entries.
+        """
+        files = {key: value for key, value in self.entries.items() if not prune or key in self._seen}
+        tmp_path = self.path.with_suffix('.tmp')
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"fingerprint": self.fingerprint, "files": files}, f)
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError) as e:
+            logger.error(f"Could not save manifest {self.path}: {e}")
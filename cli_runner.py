@@ -1,11 +1,14 @@
 # CLI Runner for KYO QA Knowledge Tool
 import argparse
-from datetime import datetime
+import tempfile
+import threading
+import zipfile
+from datetime import datetime
 from pathlib import Path
 
-from processing_engine import process_folder, process_zip_archive
+from processing_engine import run_processing_job
 from logging_utils import setup_logger
-from file_utils import ensure_folders
+from config import MAX_WORKERS, EARLY_EXIT_MAX_PAGES
 
 logger = setup_logger("cli")
 
@@ -15,35 +18,73 @@ def timestamped_copy(filepath):
     new_path = out_path.with_name(f"{out_path.stem}_{ts}{out_path.suffix}")
     return new_path
 
+class ConsoleQueue:
+    """Stands in for the GUI response queue and prints job messages."""
+    def __init__(self):
+        self.result_path = None
+
+    def put(self, msg):
+        msg_type = msg.get("type")
+        if msg_type in ("log", "status"):
+            print(msg.get("msg"))
+        elif msg_type == "result_path":
+            self.result_path = msg.get("path")
+        elif msg_type == "finish":
+            print(f"Job {msg.get('status')}.")
+
 def main():
     parser = argparse.ArgumentParser(description="KYO QA ServiceNow CLI Tool")
     parser.add_argument("--folder", help="Path to folder of PDFs")
     parser.add_argument("--zip", help="Path to a zip file of PDFs")
     parser.add_argument("--excel", help="Path to existing Excel template")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Number of worker processes")
+    parser.add_argument("--ocr-threads", type=int, help="Scanned pages OCR'd at once per document (default: cores / workers)")
+    parser.add_argument("--early-exit", action="store_true", help="Stop reading a PDF once its required fields are harvested")
+    parser.add_argument("--max-pages", type=int, default=EARLY_EXIT_MAX_PAGES, help="Page budget per PDF with --early-exit (0 = no limit)")
+    parser.add_argument("--roi-ocr", action="store_true", help="OCR the header regions of scanned PDFs first")
+    parser.add_argument("--adaptive-dpi", action="store_true", help="OCR scanned pages at low DPI first and re-OCR only low-confidence pages")
+    parser.add_argument("--preprocess", help="Comma-separated image preprocessing steps before OCR, e.g. crop_borders,deskew")
+    parser.add_argument("--incremental", action="store_true", help="Only process files that changed since the last run")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted job from its checkpoint journal")
     args = parser.parse_args()
 
-    # Ensure required output folders exist before processing
-    ensure_folders()
-
     if not args.excel or not Path(args.excel).exists():
         print("\nERROR: You must provide a valid Excel file using --excel\n")
         return
 
-    output_excel = timestamped_copy(args.excel)
-    Path(args.excel).rename(output_excel)
-    print(f"Using working copy: {output_excel}")
-
-    if args.folder:
-        print(f"Processing folder: {args.folder}")
-        process_folder(args.folder, output_excel, print, print, print, print, lambda: False)
-    elif args.zip:
-        print(f"Processing zip archive: {args.zip}")
-        process_zip_archive(args.zip, output_excel, print, print, print, print, lambda: False)
-    else:
+    if not args.folder and not args.zip:
         print("\nERROR: You must specify either --folder or --zip\n")
         return
 
-    print("\n✅ Done. Updated Excel saved to:", output_excel)
+    job = {
+        "excel_path": args.excel,
+        "output_dir": Path(args.excel).parent,
+        "max_workers": args.workers,
+        "ocr_threads": args.ocr_threads,
+        "early_exit": args.early_exit,
+        "max_pages": args.max_pages,
+        "roi_ocr": args.roi_ocr,
+        "adaptive_dpi": args.adaptive_dpi,
+        "incremental": args.incremental,
+        "resume": args.resume,
+    }
+    if args.preprocess is not None:
+        job["preprocess"] = [step.strip() for step in args.preprocess.split(",") if step.strip()]
+    response_queue = ConsoleQueue()
+
+    with tempfile.TemporaryDirectory(prefix="kyo_qa_zip_") as extract_dir:
+        if args.folder:
+            print(f"Processing folder: {args.folder}")
+            job["input_path"] = args.folder
+        else:
+            print(f"Processing zip archive: {args.zip}")
+            with zipfile.ZipFile(args.zip) as archive:
+                archive.extractall(extract_dir)
+            job["input_path"] = extract_dir
+        run_processing_job(job, response_queue, threading.Event(), threading.Event())
+
+    if response_queue.result_path:
+        print("\n✅ Done. Report saved to:", response_queue.result_path)
 
 if __name__ == "__main__":
     main()
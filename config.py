@@ -20,6 +20,8 @@ LANGUAGE_PATTERNS = []
 EXCLUSION_PATTERNS = []
 UNWANTED_AUTHORS = []
 STANDARDIZATION_RULES = {}  # Rules are a dictionary
+# The built-in pattern lists, kept before custom_patterns.py replaces them.
+BUILTIN_PATTERNS = {name: value for name, value in globals().items() if name.endswith("_PATTERNS")}
 
 # --- Now, try to overwrite the defaults with values from custom_patterns.py ---
 try:
@@ -40,6 +42,44 @@ PDF_TXT_DIR = OUTPUT_DIR / 'pdf_texts'
 CACHE_DIR = BASE_DIR / 'cache'
 CONFIG_FILE = BASE_DIR / 'config.json'
 
+# --- Processing Performance Settings ---
+# Number of worker processes used for document extraction. 1 keeps the
+# original one-file-at-a-time behaviour.
+MAX_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+# Upper bound for the extracted-text cache in CACHE_DIR (least recently used
+# entries are evicted first).
+EXTRACTION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Upper bound for the per-page OCR result cache in CACHE_DIR.
+OCR_CACHE_MAX_BYTES = 128 * 1024 * 1024
+# Scanned pages of one document OCR'd at the same time. Jobs divide the CPU
+# count by the worker processes and never go above this.
+OCR_THREADS = max(1, min(4, os.cpu_count() or 1))
+# OpenMP threads per Tesseract process while pages are OCR'd concurrently.
+# Left unset when OMP_THREAD_LIMIT is already defined in the environment.
+OCR_OMP_THREAD_LIMIT = 1
+# Image preprocessing steps run on page images before OCR, in order (see
+# image_preprocessing.STEPS: grayscale, crop_borders, deskew, binarize).
+# Jobs can override this with their own "preprocess" list.
+OCR_PREPROCESS_STEPS = []
+# Harvested fields that must be found before extraction of a PDF may stop
+# early (early exit) or skip full-page OCR (ROI OCR).
+REQUIRED_FIELDS = ["models", "document_title", "revision"]
+# Early exit: when a job enables it, PDFs are read page by page and
+# extraction stops once the required fields have all been found, or after
+# EARLY_EXIT_MAX_PAGES pages (0 reads on to the end of the document).
+EARLY_EXIT_MAX_PAGES = 0
+# Matching time a harvest pattern may take on one document. Patterns that
+# take longer are quarantined (see pattern_registry) and skipped until they
+# are changed or released; 0 turns the limit off.
+PATTERN_TIMEOUT_SECONDS = 2.0
+# ROI OCR: when a job enables it, a scanned first page is OCR'd only inside
+# these regions first. Regions are (x0, y0, x1, y1) fractions of the page;
+# the first template whose filename pattern matches the file is used.
+ROI_TEMPLATES = {
+    "service_bulletin": {"filename_pattern": r"^(QA|SB)[_\- ]", "regions": [(0.0, 0.0, 1.0, 0.3)]},
+    "default": {"filename_pattern": r".", "regions": [(0.0, 0.0, 1.0, 0.35)]},
+}
+
 # --- GUI and App Color Configuration ---
 BRAND_COLORS = {
     "background": KyoceraColors.LIGHT_GREY,
@@ -5,78 +5,169 @@ import pandas as pd
 import logging
 
 # Local module imports
-from config import (
-    MODEL_PATTERNS,
-    PART_NUMBER_PATTERNS,
-    SERIAL_NUMBER_PATTERNS,
-    QA_NUMBER_PATTERNS,
-    DOCUMENT_TYPE_PATTERNS,
-    DOCUMENT_TITLE_PATTERNS,
-    REVISION_PATTERNS,
-    LANGUAGE_PATTERNS,
-    EXCLUSION_PATTERNS,
-    UNWANTED_AUTHORS,
-    STANDARDIZATION_RULES
-)
+import pattern_registry
 import logging_utils
 
 # --- FIX: Use the correct function name `setup_logger` ---
 # This was the cause of the AttributeError.
 logger = logging_utils.setup_logger("harvesters")
 
-def harvest_all_data(text, qa_number):
+def harvest_all_data(text, qa_number, stats=None):
     """
     Harvests all specified data points from the given text.
+    Literal prefilter counts and quarantined patterns are added to the
+    stats Counter when given.
     """
-    data = {
-        'qa_number': qa_number,
-        'models': harvest_data(text, MODEL_PATTERNS),
-        'part_numbers': harvest_data(text, PART_NUMBER_PATTERNS),
-        'serial_numbers': harvest_data(text, SERIAL_NUMBER_PATTERNS),
-        'document_type': harvest_data(text, DOCUMENT_TYPE_PATTERNS, max_capture=1),
-        'document_title': harvest_data(text, DOCUMENT_TITLE_PATTERNS, max_capture=1),
-        'revision': harvest_data(text, REVISION_PATTERNS, max_capture=1),
-        'language': harvest_data(text, LANGUAGE_PATTERNS, max_capture=1)
-    }
+    patterns = pattern_registry.registry.current()
+    # One walk of the text finds the matches of every field's patterns.
+    found = patterns.scanner(FIELD_PATTERNS).scan(text, stats, on_timeout=_quarantine(qa_number, stats))
+    data = {'qa_number': qa_number}
+    for field, matches in found.items():
+        data[field] = _clean_matches(matches, patterns, max_capture=1 if field in SINGLE_VALUE_FIELDS else None)
     return data
 
-def harvest_data(text, patterns, max_capture=None):
+def _quarantine(qa_number, stats=None):
+    """Returns a callback that quarantines a pattern which ran out of time on qa_number."""
+    def on_timeout(pattern):
+        pattern_registry.registry.quarantine(pattern.pattern, qa_number)
+        if stats is not None:
+            stats[("pattern_quarantined", pattern.pattern)] += 1
+    return on_timeout
+
+# Pattern list behind every harvested field, in report column order.
+FIELD_PATTERNS = {
+    'models': 'MODEL_PATTERNS',
+    'part_numbers': 'PART_NUMBER_PATTERNS',
+    'serial_numbers': 'SERIAL_NUMBER_PATTERNS',
+    'document_type': 'DOCUMENT_TYPE_PATTERNS',
+    'document_title': 'DOCUMENT_TITLE_PATTERNS',
+    'revision': 'REVISION_PATTERNS',
+    'language': 'LANGUAGE_PATTERNS',
+}
+# Fields that keep only their first value.
+SINGLE_VALUE_FIELDS = {'document_type', 'document_title', 'revision', 'language'}
+
+def harvest_batch(texts, stats=None):
+    """
+    Harvests many documents at once. texts is an iterable of (qa_number, text)
+    pairs; returns a DataFrame with one row per document, in order, holding
+    exactly what harvest_all_data returns for it. Scanners and standardized
+    values are shared by the documents of a batch.
+    """
+    columns = {'qa_number': [], **{field: [] for field in FIELD_PATTERNS}}
+    for qa_number, text in texts:
+        # Looked up per document so a pattern quarantined midway is dropped.
+        patterns = pattern_registry.registry.current()
+        scanner = patterns.scanner(FIELD_PATTERNS)
+        columns['qa_number'].append(qa_number)
+        for field, matches in scanner.scan(text, stats, on_timeout=_quarantine(qa_number, stats)).items():
+            max_capture = 1 if field in SINGLE_VALUE_FIELDS else None
+            columns[field].append(_clean_matches(matches, patterns, max_capture))
+    # Object columns keep None for fields that were not found, as harvest_all_data does.
+    return pd.DataFrame({column: pd.Series(values, dtype=object) for column, values in columns.items()})
+
+def missing_fields(text, required_fields, stats=None):
+    """
+    Returns the required fields that none of their patterns find in text.
+    Literal prefilter counts and quarantined patterns are added to stats
+    when given.
+    """
+    unknown = [field for field in required_fields if field not in FIELD_PATTERNS]
+    if unknown:
+        raise ValueError(f"Unknown required fields: {', '.join(unknown)}")
+    patterns = pattern_registry.registry.current()
+    return [field for field in required_fields if not harvest_data(text, patterns[FIELD_PATTERNS[field]], stats=stats)]
+
+def harvest_pages(pages, qa_number, required_fields, max_pages=0, stats=None):
+    """
+    Harvests a document page by page. Pages are pulled from the pages
+    iterable only until every required field has been found or max_pages
+    pages have been read (0 means no limit); an unfinished iterable is
+    closed so it can stop extracting.
+    Returns (data, text, pages_read), where data is harvest_all_data over
+    the text of the pages read. stats collects the pattern counts of every
+    check, as in harvest_all_data.
+    """
+    missing = list(required_fields)
+    page_texts = []
+    for page_text in pages:
+        page_texts.append(page_text)
+        missing = missing_fields(page_text, missing, stats)
+        if not missing or (max_pages and len(page_texts) >= max_pages):
+            break
+    close = getattr(pages, "close", None)
+    if close:
+        close()
+
+    text = "\n".join(page_texts).strip()
+    return harvest_all_data(text, qa_number, stats=stats), text, len(page_texts)
+
+def get_pattern_fingerprint():
+    """
+    Returns a hash of every pattern list and rule used by harvest_all_data,
+    so stored harvest results can be invalidated when the patterns change.
+    """
+    return pattern_registry.registry.current().fingerprint
+
+def harvest_data(text, patterns, max_capture=None, stats=None):
     """
     Generic function to find data in text based on a list of regex patterns.
+    Patterns may be compiled (see pattern_registry) or raw strings.
+    Literal prefilter counts and quarantined patterns are added to stats
+    when given.
     """
-    results = []
+    current = pattern_registry.registry.current()
+    folded = pattern_registry.fold_text(text)
+    matches = []
+    skipped = []
+    runs = 0
     for pattern in patterns:
         try:
-            matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-            for match in matches:
-                # If the pattern uses capturing groups, the result might be a tuple
-                if isinstance(match, tuple):
-                    # Find the first non-empty group
-                    actual_match = next((item for item in match if item), None)
-                else:
-                    actual_match = match
-
-                if actual_match and actual_match.strip():
-                    results.append(standardize_data(actual_match.strip()))
+            regex = pattern_registry.compile_pattern(pattern) if isinstance(pattern, str) else pattern
         except re.error as e:
             logger.error(f"Regex error with pattern '{pattern}': {e}")
-            
+            continue
+        # Skip patterns whose required literals are not in the text.
+        if not pattern_registry.may_match(regex, folded):
+            skipped.append(regex)
+            continue
+        runs += 1
+        if regex not in current.guarded:
+            found = regex.findall(text)
+        else:
+            try:
+                found = pattern_registry.guarded_findall(regex, text)
+            except TimeoutError:
+                _quarantine(None, stats)(regex)
+                continue
+        for match in found:
+            # If the pattern uses capturing groups, the result might be a tuple
+            if isinstance(match, tuple):
+                # Find the first non-empty group
+                match = next((item for item in match if item), None)
+            matches.append(match)
+    if stats is not None:
+        pattern_registry.count_prefilter(stats, skipped, runs)
+    return _clean_matches(matches, current, max_capture)
+
+def _clean_matches(matches, patterns, max_capture=None):
+    """Standardizes, de-duplicates, sorts and filters raw matches."""
+    results = {patterns.standardize(match.strip()) for match in matches if match and match.strip()}
+
     # Remove duplicates and items in the exclusion list
-    unique_results = sorted(list(set(results)))
-    filtered_results = [res for res in unique_results if not any(re.search(ex, res, re.IGNORECASE) for ex in EXCLUSION_PATTERNS)]
+    filtered_results = sorted(res for res in results if not patterns.is_excluded(res))
 
     if max_capture:
         return filtered_results[0] if filtered_results else None
-        
+
     return filtered_results
 
-def standardize_data(value):
+def standardize_data(value, patterns=None):
     """
     Applies standardization rules to the captured data.
     """
-    for rule, replacement in STANDARDIZATION_RULES.items():
-        value = re.sub(rule, replacement, value, flags=re.IGNORECASE)
-    return value
+    patterns = patterns or pattern_registry.registry.current()
+    return patterns.standardize(value)
 
 def harvest_author(text):
     """
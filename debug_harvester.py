@@ -1,30 +1,34 @@
 # debug_harvester.py
+import argparse
+import json
 import sys
 from pathlib import Path
-from ocr_utils import extract_text_from_pdf, TESSERACT_AVAILABLE
-from data_harvesters import harvest_all_data
-from config import MODEL_PATTERNS
+from data_harvesters import FIELD_PATTERNS, _clean_matches, harvest_all_data
+import pattern_registry
 import time
 
 def test_model_extraction(pdf_path: Path):
     """
     Extracts text from a single PDF and runs the model harvesting logic on it.
     """
+    # Only the PDF check needs the OCR stack; profiling works on extracted text.
+    from ocr_utils import get_text_from_pdf, tesseract_available
+
     print("="*60)
     print(f"--- Testing PDF: {pdf_path.name} ---")
     print("="*60)
 
     # 1. Check for Tesseract (from ocr_utils.py)
-    print("\n[Step 1: OCR Check]")
-    if TESSERACT_AVAILABLE:
+    print("\n[Step 1: OCR Check]")
+    if tesseract_available():
         print("✅ Tesseract OCR is available.")
     else:
         print("⚠️ Tesseract OCR not found. Extraction will rely on embedded text only.")
 
     # 2. Extract raw text using the app's own OCR utility
-    print("\n[Step 2: Extracting Text]")
+    print("\n[Step 2: Extracting Text]")
     start_time = time.time()
-    raw_text = extract_text_from_pdf(pdf_path)
+    raw_text = get_text_from_pdf(pdf_path)
     end_time = time.time()
 
     if not raw_text or not raw_text.strip():
@@ -34,33 +38,135 @@ def test_model_extraction(pdf_path: Path):
     print(f"✅ Text extracted in {end_time - start_time:.2f} seconds ({len(raw_text)} characters).")
 
     # 3. Run the model harvesting logic
-    print("\n[Step 3: Harvesting Models]")
-    print(f"-> Using {len(MODEL_PATTERNS)} patterns from config.py")
-    
-    # Use harvest_all_data to extract models and related metadata
-    extracted_data = harvest_all_data(raw_text, pdf_path.name)
+    print("\n[Step 3: Harvesting Models]")
+    print(f"-> Using {len(pattern_registry.registry.current()['MODEL_PATTERNS'])} patterns from custom_patterns.py")
+
+    # Use harvest_all_data to extract models and related metadata
+    extracted_data = harvest_all_data(raw_text, pdf_path.name)
     found_models_str = extracted_data.get("models")
 
     # 4. Print the final results
     print("\n" + "="*25 + " RESULTS " + "="*26)
     if found_models_str and found_models_str != 'Not Found':
-        print("✅ SUCCESS: Found the following models:")
+        print("✅ SUCCESS: Found the following models:")
         print(f"\n    {found_models_str}\n")
     else:
         print(f"❌ FAILURE: No models were found in '{pdf_path.name}'.")
-        print("-> This means the patterns in 'config.py' did not match any text in the PDF.")
+        print("-> This means the patterns in 'custom_patterns.py' did not match any text in the PDF.")
     print("="*60)
 
 
-if __name__ == "__main__":
-    # Check if a file path was provided as a command-line argument
-    if len(sys.argv) > 1:
-        pdf_file = Path(sys.argv[1])
+def iter_cached_texts(folder: Path):
+    """
+    Yields (name, text) for every extracted text under folder: .txt files
+    (such as the needs_review folder) and extraction cache entries (.json
+    files with a "text" field, as in cache/extracted_text).
+    """
+    for path in sorted(Path(folder).rglob('*')):
+        suffix = path.suffix.lower()
+        if suffix == '.txt':
+            yield path.stem, path.read_text(encoding='utf-8', errors='replace')
+        elif suffix == '.json':
+            try:
+                entry = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            if isinstance(entry, dict) and isinstance(entry.get('text'), str):
+                yield path.stem, entry['text']
+
+
+def profile_patterns(documents, timeout: float = None):
+    """
+    Runs every harvest pattern on its own over the (name, text) documents.
+    Returns (document count, one dict per pattern, most expensive first).
+    Each dict holds the pattern's list and index, the seconds spent,
+    the runs (documents the literal prefilter let it run on), matches,
+    unique cleaned values, sole documents (where no other pattern of its
+    list kept a value) and timeouts. Each run is first checked under the
+    time limit in the match process; runs that time out are only counted,
+    the others are timed with a plain findall, so the seconds hold no
+    guard overhead. A job runs the patterns together in one scan, so use
+    the times to compare patterns, not to predict job time.
+    """
+    patterns = pattern_registry.registry.current()
+    lists = {name: patterns[name] for name in dict.fromkeys(FIELD_PATTERNS.values())}
+    profiles = {name: [{"list": name, "index": index, "pattern": pattern.pattern, "seconds": 0.0, "runs": 0,
+                        "matches": 0, "values": set(), "sole_documents": 0, "timeouts": 0}
+                       for index, pattern in enumerate(compiled)]
+                for name, compiled in lists.items()}
+    count = 0
+    for _, text in documents:
+        count += 1
+        folded = pattern_registry.fold_text(text)
+        for name, compiled in lists.items():
+            contributors = []
+            for entry, pattern in zip(profiles[name], compiled):
+                if not pattern_registry.may_match(pattern, folded):
+                    continue
+                entry["runs"] += 1
+                try:
+                    pattern_registry.guarded_findall(pattern, text, timeout)
+                except TimeoutError:
+                    entry["timeouts"] += 1
+                    continue
+                start = time.perf_counter()
+                found = pattern.findall(text)
+                entry["seconds"] += time.perf_counter() - start
+                entry["matches"] += len(found)
+                values = _clean_matches([pattern_registry._first_value(match) for match in found], patterns)
+                entry["values"].update(values)
+                if values:
+                    contributors.append(entry)
+            if len(contributors) == 1:
+                contributors[0]["sole_documents"] += 1
+
+    rows = []
+    for entry in (entry for entries in profiles.values() for entry in entries):
+        values = entry.pop("values")
+        rows.append({**entry, "unique_values": len(values),
+                     "sole_share": entry["sole_documents"] / count if count else 0.0})
+    rows.sort(key=lambda row: -row["seconds"])
+    return count, rows
+
+
+def print_profile(count: int, rows: list, top: int = 0):
+    """Prints the profile rows as a table."""
+    print(f"Profiled {len(rows)} patterns over {count} documents (most expensive first)\n")
+    print(f"{'seconds':>9}{'ms/run':>8}{'runs':>7}{'matches':>9}{'unique':>8}{'sole %':>8}{'t/o':>5}  pattern")
+    for row in rows[:top or None]:
+        per_run = row["seconds"] / row["runs"] * 1000 if row["runs"] else 0.0
+        print(f"{row['seconds']:>9.3f}{per_run:>8.2f}{row['runs']:>7}{row['matches']:>9}{row['unique_values']:>8}"
+              f"{row['sole_share'] * 100:>7.1f}%{row['timeouts']:>5}  {row['list']}[{row['index']}] {row['pattern']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Debug harvesting on one PDF, or profile the harvest patterns over a folder of extracted texts")
+    parser.add_argument("pdf", nargs="?", help="PDF to extract and harvest")
+    parser.add_argument("--profile", metavar="FOLDER", help="Profile every harvest pattern over the .txt files and extraction cache entries in FOLDER")
+    parser.add_argument("--json", default="pattern_profile.json", help="Where --profile writes its JSON report")
+    parser.add_argument("--top", type=int, default=0, help="Only print the N most expensive patterns")
+    args = parser.parse_args()
+
+    if args.profile:
+        folder = Path(args.profile)
+        if not folder.is_dir():
+            sys.exit(f"Error: Folder not found -> {args.profile}")
+        count, rows = profile_patterns(iter_cached_texts(folder))
+        print_profile(count, rows, args.top)
+        Path(args.json).write_text(json.dumps({"documents": count, "patterns": rows}, indent=2), encoding='utf-8')
+        print(f"\nJSON report written to {args.json}")
+    elif args.pdf:
+        pdf_file = Path(args.pdf)
         if pdf_file.exists() and pdf_file.suffix.lower() == '.pdf':
             test_model_extraction(pdf_file)
         else:
-            print(f"Error: File not found or is not a PDF -> {sys.argv[1]}")
+            print(f"Error: File not found or is not a PDF -> {args.pdf}")
     else:
         # Instructions on how to run the script
         print("Usage: python debug_harvester.py \"path/to/your/file.pdf\"")
-        print("\nExample: python debug_harvester.py \"QA_20146_E035 LEAFLET_2.pdf\"")
+        print("       python debug_harvester.py --profile \"path/to/extracted/texts\" [--json report.json]")
+        print("\nExample: python debug_harvester.py \"QA_20146_E035 LEAFLET_2.pdf\"")
+
+
+if __name__ == "__main__":
+    main()
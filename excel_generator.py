@@ -1,10 +1,22 @@
 # excel_generator.py
+import json
 import logging
+import os
+from pathlib import Path
 import pandas as pd
 logger = logging.getLogger(__name__)
+
+def _cell_value(value):
+    """Converts a row value the way pandas does when writing a DataFrame."""
+    if isinstance(value, (list, tuple, dict)):
+        return str(value)
+    return value
+
 class ExcelGenerator:
     def __init__(self, output_filepath):
         self.output_filepath = output_filepath
+        self.spool_path = Path(f"{output_filepath}.rows.jsonl")
+        self._spool = None
     def create_report(self, data):
         if not data:
             df = pd.DataFrame()
@@ -15,4 +27,45 @@ class ExcelGenerator:
                 df.to_excel(writer, sheet_name='QA_Report', index=False)
         except Exception as e:
             logger.error(f"Failed to create Excel report: {e}")
-            raise
\ No newline at end of file
+            raise
+    def open(self):
+        """Starts a streamed report. Rows are spooled to disk as they are added."""
+        self._spool = open(self.spool_path, 'w', encoding='utf-8')
+    def add_row(self, row: dict):
+        """Appends one row to the spool; it is on disk once this returns."""
+        self._spool.write(json.dumps(row, default=str) + "\n")
+        self._spool.flush()
+    def _iter_spooled_rows(self):
+        with open(self.spool_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    def close(self):
+        """
+        Writes the spooled rows to the Excel file and removes the spool.
+        The workbook is written in openpyxl's write-only mode, so memory use
+        does not grow with the number of rows.
+        """
+        from openpyxl import Workbook
+
+        self._spool.close()
+        columns = []
+        for row in self._iter_spooled_rows():
+            columns.extend(key for key in row if key not in columns)
+        try:
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet('QA_Report')
+            sheet.append(columns)
+            for row in self._iter_spooled_rows():
+                sheet.append([_cell_value(row.get(column)) for column in columns])
+            workbook.save(self.output_filepath)
+        except Exception as e:
+            logger.error(f"Failed to create Excel report: {e}")
+            raise
+        os.remove(self.spool_path)
+    def abort(self):
+        """Stops a streamed report without writing the Excel file."""
+        if self._spool and not self._spool.closed:
+            self._spool.close()
+        if self.spool_path.exists():
+            os.remove(self.spool_path)
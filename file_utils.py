@@ -3,7 +3,6 @@ import sys
 import shutil
 import tempfile
 import logging
-from tkinter import messagebox
 from pathlib import Path
 import stat # <-- Required for changing file attributes
 
@@ -37,29 +36,44 @@ def get_resource_path(relative_path):
 
 def find_tesseract_executable():
     """
-    Find the tesseract.exe executable in a prioritized order.
+    Find the Tesseract executable in a prioritized order: the TESSERACT_CMD
+    environment variable, the bundled and local Tesseract-OCR folders, the
+    standard Windows install folders, then the PATH. Raises
+    FileNotFoundError without any dialog, so it is safe on headless workers;
+    the caller decides how to tell the user.
     """
     logging.info("Searching for Tesseract executable...")
-    
+
+    env_path = os.environ.get("TESSERACT_CMD")
+    if env_path:
+        if Path(env_path).is_file():
+            logging.info(f"Found Tesseract from TESSERACT_CMD: {env_path}")
+            return env_path
+        logging.warning(f"TESSERACT_CMD is set but '{env_path}' does not exist. Searching elsewhere.")
+
+    exe_name = 'tesseract.exe' if os.name == 'nt' else 'tesseract'
     search_paths = []
     if getattr(sys, 'frozen', False):
-        search_paths.append(Path(sys._MEIPASS) / 'Tesseract-OCR' / 'tesseract.exe')
-    
-    search_paths.extend([
-        Path.cwd() / 'Tesseract-OCR' / 'tesseract.exe',
-        Path(os.environ.get("ProgramFiles", "C:/Program Files")) / "Tesseract-OCR" / "tesseract.exe",
-        Path(os.environ.get("LOCALAPPDATA", "")) / "Programs" / "Tesseract-OCR" / "tesseract.exe"
-    ])
+        search_paths.append(Path(sys._MEIPASS) / 'Tesseract-OCR' / exe_name)
+
+    search_paths.append(Path.cwd() / 'Tesseract-OCR' / exe_name)
+    if os.name == 'nt':
+        search_paths.extend([
+            Path(os.environ.get("ProgramFiles", "C:/Program Files")) / "Tesseract-OCR" / "tesseract.exe",
+            Path(os.environ.get("LOCALAPPDATA", "")) / "Programs" / "Tesseract-OCR" / "tesseract.exe"
+        ])
 
     for path in search_paths:
-        if path.exists():
+        if path.is_file():
             logging.info(f"Found Tesseract at: {path}")
             return str(path)
 
-    error_message = "Tesseract OCR executable not found. Please ensure Tesseract is installed and accessible."
-    logging.error(error_message)
-    messagebox.showerror("Dependency Error", error_message)
-    raise FileNotFoundError(error_message)
+    on_path = shutil.which('tesseract')
+    if on_path:
+        logging.info(f"Found Tesseract on PATH: {on_path}")
+        return on_path
+
+    raise FileNotFoundError("Tesseract OCR executable not found. Install it, add it to PATH or set TESSERACT_CMD.")
 
 def is_file_locked(filepath):
     """
@@ -76,6 +90,8 @@ def is_file_locked(filepath):
 def create_temp_working_dir():
     """
     Creates a temporary directory to safely store and process file copies.
+    Returns None when it cannot be created; the caller reports the failure,
+    so this stays usable without a GUI.
     """
     try:
         temp_dir = tempfile.mkdtemp(prefix="kyo_qa_")
@@ -83,7 +99,6 @@ def create_temp_working_dir():
         return Path(temp_dir)
     except Exception as e:
         logging.error(f"Failed to create temporary directory: {e}")
-        messagebox.showerror("Error", f"Could not create a temporary working directory: {e}")
         return None
 
 def cleanup_directory(directory_path):
@@ -99,7 +114,6 @@ def cleanup_directory(directory_path):
         logging.info(f"Successfully cleaned up directory: {directory_path}")
     except Exception as e:
         logging.error(f"An unexpected error occurred during cleanup of {directory_path}: {e}")
-        messagebox.showwarning("Cleanup Failed", f"An error occurred while cleaning up files:\n{e}")
 
 def setup_output_folders(base_dir):
     """
@@ -123,11 +137,12 @@ def setup_output_folders(base_dir):
 
 # --- Compatibility Functions ---
 def open_file(filepath):
-    """Opens a file with the default application."""
+    """Opens a file with the default application. GUI only: failures are shown in a dialog."""
     try:
         os.startfile(filepath)
     except Exception as e:
         logging.error(f"Failed to open file {filepath}: {e}")
+        from tkinter import messagebox
         messagebox.showerror("Error", f"Could not open the file:\n{filepath}")
 
 def ensure_folders(base_dir):
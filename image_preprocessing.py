@@ -0,0 +1,144 @@
+# image_preprocessing.py
+# Optional clean-up of page images before OCR, done with vectorized NumPy.
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from PIL import Image
+
+# Adaptive binarization: a pixel is black when it is darker than the mean of
+# the BINARIZE_BLOCK_SIZE square around it minus BINARIZE_OFFSET.
+BINARIZE_BLOCK_SIZE = 31
+BINARIZE_OFFSET = 10
+# Deskew searches +/- DESKEW_MAX_ANGLE degrees in DESKEW_STEP increments,
+# scoring at most DESKEW_SAMPLE_PIXELS dark pixels per angle.
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.25
+DESKEW_SAMPLE_PIXELS = 20000
+# Border crop removes edge rows/columns in which more than BORDER_DARK_RATIO
+# of the pixels are darker than BORDER_DARK_LEVEL (scanner lid shadows).
+BORDER_DARK_LEVEL = 80
+BORDER_DARK_RATIO = 0.5
+
+
+def to_grayscale(image: np.ndarray) -> np.ndarray:
+    """Converts an HxW or HxWxC uint8 array to HxW luminance; alpha is ignored."""
+    if image.ndim == 2:
+        return image
+    if image.shape[2] < 3:
+        return image[:, :, 0]
+    weights = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return (image[:, :, :3] @ weights).clip(0, 255).astype(np.uint8)
+
+
+def _box_sums(values: np.ndarray, radius: int) -> tuple:
+    """
+    Sums and pixel counts over a (2*radius+1) square around every pixel,
+    from one zero-padded integral image. The integral wraps around in
+    uint32 on large pages, but window sums are far below 2**32 so the
+    differences are still exact.
+    """
+    h, w = values.shape
+    k = 2 * radius + 1
+    integral = np.zeros((h + k, w + k), dtype=np.uint32)
+    integral[radius + 1:radius + 1 + h, radius + 1:radius + 1 + w] = values
+    np.cumsum(integral, axis=1, out=integral)
+    np.cumsum(integral, axis=0, out=integral)
+    sums = integral[k:, k:] - integral[:-k, k:] - integral[k:, :-k] + integral[:-k, :-k]
+
+    def window_lengths(n):
+        positions = np.arange(n)
+        return (np.minimum(positions + radius + 1, n) - np.maximum(positions - radius, 0)).astype(np.uint32)
+
+    counts = window_lengths(h)[:, None] * window_lengths(w)[None, :]
+    return sums, counts
+
+
+def adaptive_binarize(image: np.ndarray, block_size: int = BINARIZE_BLOCK_SIZE, offset: int = BINARIZE_OFFSET) -> np.ndarray:
+    """Thresholds each pixel against its local mean, which copes with uneven scan lighting."""
+    gray = to_grayscale(image)
+    sums, counts = _box_sums(gray, block_size // 2)
+    # gray > sums / counts - offset, kept in integers.
+    return np.where(gray.astype(np.int64) * counts + offset * counts > sums, 255, 0).astype(np.uint8)
+
+
+def estimate_skew(image: np.ndarray, max_angle: float = DESKEW_MAX_ANGLE, step: float = DESKEW_STEP) -> float:
+    """
+    Estimates the counter-clockwise rotation in degrees that straightens the
+    text lines. Dark pixels are projected onto the vertical axis at each
+    candidate angle; the angle at which the line profile is sharpest
+    (largest sum of squares) wins.
+    """
+    gray = to_grayscale(image)
+    ys, xs = np.nonzero(gray < 128)
+    if len(ys) < 100:
+        return 0.0
+    stride = max(1, len(ys) // DESKEW_SAMPLE_PIXELS)
+    ys, xs = ys[::stride].astype(np.float32), xs[::stride].astype(np.float32)
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    radians = np.deg2rad(angles).astype(np.float32)
+    projections = np.rint(ys[None, :] * np.cos(radians)[:, None] - xs[None, :] * np.sin(radians)[:, None]).astype(np.int64)
+    projections -= projections.min(axis=1, keepdims=True)
+    scores = [np.square(np.bincount(row).astype(np.float64)).sum() for row in projections]
+    return float(angles[int(np.argmax(scores))])
+
+
+def deskew(image: np.ndarray) -> np.ndarray:
+    """Rotates the page so its text lines are horizontal."""
+    gray = to_grayscale(image)
+    angle = estimate_skew(gray)
+    if not angle:
+        return gray
+    rotated = Image.fromarray(gray).rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+    return np.asarray(rotated)
+
+
+def crop_borders(image: np.ndarray) -> np.ndarray:
+    """Cuts off dark scanner borders along the page edges."""
+    gray = to_grayscale(image)
+    dark = gray < BORDER_DARK_LEVEL
+    rows = np.flatnonzero(dark.mean(axis=1) <= BORDER_DARK_RATIO)
+    cols = np.flatnonzero(dark.mean(axis=0) <= BORDER_DARK_RATIO)
+    if not len(rows) or not len(cols):
+        return gray
+    return gray[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+
+# Available steps by name. Jobs list the steps they want, in order.
+STEPS = {
+    "grayscale": to_grayscale,
+    "crop_borders": crop_borders,
+    "deskew": deskew,
+    "binarize": adaptive_binarize,
+}
+
+
+def register_step(name: str, step) -> None:
+    """Adds a preprocessing step taking and returning a uint8 NumPy array."""
+    STEPS[name] = step
+
+
+def validate_steps(steps) -> list:
+    """Returns the step names as a list, raising ValueError for unknown ones."""
+    unknown = [name for name in steps if name not in STEPS]
+    if unknown:
+        raise ValueError(f"Unknown preprocessing steps: {', '.join(unknown)}")
+    return list(steps)
+
+
+def preprocess(image: np.ndarray, steps, timings: dict = None) -> np.ndarray:
+    """Runs the named steps in order. Seconds per step are added to timings if given."""
+    for name in steps:
+        start = time.perf_counter()
+        image = STEPS[name](image)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+    return image
+
+
+def preprocess_image(img: Image.Image, steps, timings: dict = None) -> Image.Image:
+    """PIL wrapper around preprocess(); returns img unchanged when there are no steps."""
+    if not steps:
+        return img
+    return Image.fromarray(preprocess(np.asarray(img), steps, timings))
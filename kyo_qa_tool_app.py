@@ -7,8 +7,8 @@ import time
 import os
 
 # Local module imports
-from config import BRAND_COLORS, ASSETS_DIR, get_app_version, OUTPUT_DIR
-from processing_engine import run_processing_job
+from config import BRAND_COLORS, ASSETS_DIR, get_app_version, OUTPUT_DIR, MAX_WORKERS
+from processing_engine import run_processing_job, journal_path_for
 from file_utils import open_file
 from kyo_review_tool import ReviewWindow
 import logging_utils
@@ -97,8 +97,14 @@ class KyoQAToolApp(tk.Tk):
             "excel_path": excel_path,
             "input_path": input_path,
             "output_dir": Path(excel_path).parent,
-            "is_rerun": is_rerun
+            "is_rerun": is_rerun,
+            "max_workers": MAX_WORKERS,
+            "resume": False
         }
+
+        journal_path = journal_path_for(Path(excel_path).parent / f"cloned_{Path(excel_path).name}")
+        if journal_path.exists():
+            job["resume"] = messagebox.askyesno("Resume Job", "A previous job for this Excel file did not finish.\n\nResume it and skip the files already processed?")
         
         self.update_ui_for_start()
         log_target = "flagged files" if is_rerun else (Path(self.selected_folder.get()).name if self.selected_folder.get() else f"{len(self.selected_files_list)} files")
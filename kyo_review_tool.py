@@ -10,6 +10,7 @@ import re
 import importlib
 
 from config import BRAND_COLORS
+import pattern_registry
 
 def generate_regex_from_sample(sample: str) -> str:
     """
@@ -69,6 +70,8 @@ class ReviewWindow(tk.Toplevel):
         ttk.Button(btn_frame, text="Add as New", command=self.add_pattern).pack(side="left", padx=5)
         self.remove_btn = ttk.Button(btn_frame, text="Remove Selected", command=self.remove_pattern, state=tk.DISABLED)
         self.remove_btn.pack(side="left", padx=5)
+        self.release_btn = ttk.Button(btn_frame, text="Release from Quarantine", command=self.release_pattern, state=tk.DISABLED)
+        self.release_btn.pack(side="left", padx=5)
         
         ttk.Label(manager_frame, text="Test / Edit Pattern:", font=("Segoe UI", 10, "bold")).grid(row=3, column=0, columnspan=2, sticky="w", pady=(10,0))
         self.pattern_entry = ttk.Entry(manager_frame, font=("Consolas", 10))
@@ -84,6 +87,9 @@ class ReviewWindow(tk.Toplevel):
         ttk.Button(test_save_frame, text="Update List", command=self.update_pattern_in_list).pack(side="left", padx=5)
         
         ttk.Button(manager_frame, text="Save All Patterns", style="Red.TButton", command=self.save_patterns_to_config).grid(row=6, column=0, columnspan=2, pady=10, sticky="ew")
+        self.quarantine_label = ttk.Label(manager_frame, text="", wraplength=360)
+        self.quarantine_label.grid(row=7, column=0, columnspan=2, sticky="w")
+        self.quarantined = {}
 
         self.pdf_text = tk.Text(text_frame, wrap="word", font=("Consolas", 9), relief="solid", borderwidth=1)
         self.pdf_text.pack(fill="both", expand=True, side="left")
@@ -114,6 +120,31 @@ class ReviewWindow(tk.Toplevel):
             pass 
         for pattern in patterns_to_load:
             self.pattern_listbox.insert(tk.END, pattern)
+        self.mark_quarantined()
+
+    def mark_quarantined(self):
+        """Highlights the listed patterns that were quarantined for running out of time while harvesting."""
+        self.quarantined = pattern_registry.registry.quarantined()
+        count = 0
+        for idx, pattern in enumerate(self.pattern_listbox.get(0, tk.END)):
+            held = pattern in self.quarantined
+            count += held
+            self.pattern_listbox.itemconfig(idx, background=BRAND_COLORS["status_fail"] if held else "")
+        if count:
+            self.quarantine_label.config(text=f"{count} highlighted pattern(s) took too long on a document and are "
+                                              "quarantined: they are skipped until edited or released.")
+        else:
+            self.quarantine_label.config(text="")
+
+    def release_pattern(self):
+        selection_indices = self.pattern_listbox.curselection()
+        if not selection_indices:
+            return
+        pattern = self.pattern_listbox.get(selection_indices[0])
+        pattern_registry.registry.release(pattern)
+        self.mark_quarantined()
+        self.release_btn.config(state=tk.DISABLED)
+        messagebox.showinfo("Released", "The pattern is used again from the next document processed.", parent=self)
     
     def save_patterns_to_config(self):
         """Re-writes all pattern lists into the custom_patterns.py file correctly."""
@@ -148,7 +179,7 @@ class ReviewWindow(tk.Toplevel):
                 file_content += "]\n"
             
             self.custom_patterns_path.write_text(file_content, encoding='utf-8')
-            messagebox.showinfo("Success", "Custom patterns saved successfully!\nChanges will apply on the next run.", parent=self)
+            messagebox.showinfo("Success", "Custom patterns saved successfully!\nThey apply to the next documents processed.", parent=self)
             self.destroy()
         except Exception as e:
             messagebox.showerror("Save Failed", f"Could not save patterns to file:\n{e}", parent=self)
@@ -166,17 +197,20 @@ class ReviewWindow(tk.Toplevel):
             idx = selection_indices[0]
             self.pattern_listbox.delete(idx)
             self.pattern_listbox.insert(idx, new_pattern)
+        self.mark_quarantined()
 
     def on_pattern_select(self, event):
         selection_indices = self.pattern_listbox.curselection()
         if not selection_indices:
             self.remove_btn.config(state=tk.DISABLED)
+            self.release_btn.config(state=tk.DISABLED)
             self.pattern_entry.delete(0, tk.END)
             return
         selected_pattern = self.pattern_listbox.get(selection_indices[0])
         self.pattern_entry.delete(0, tk.END)
         self.pattern_entry.insert(0, selected_pattern)
         self.remove_btn.config(state=tk.NORMAL)
+        self.release_btn.config(state=tk.NORMAL if selected_pattern in self.quarantined else tk.DISABLED)
 
     def add_pattern(self):
         new_pattern = self.pattern_entry.get().strip()
@@ -202,17 +236,20 @@ class ReviewWindow(tk.Toplevel):
             return
         try:
             content = self.pdf_text.get("1.0", "end")
-            matches = list(re.finditer(pattern_str, content, re.IGNORECASE))
-            if not matches:
+            # Runs in the match process, so a runaway pattern cannot freeze the window.
+            spans = pattern_registry.guarded_spans(re.compile(pattern_str, re.IGNORECASE), content)
+            if not spans:
                 messagebox.showinfo("No Matches", "The pattern did not find any matches in the text.", parent=self)
                 return
-            for match in matches:
-                start, end = match.span()
+            for start, end in spans:
                 self.pdf_text.tag_add("highlight", f"1.0+{start}c", f"1.0+{end}c")
-            self.pdf_text.see(f"1.0+{matches[0].start()-100}c")
-            messagebox.showinfo("Success!", f"Found {len(matches)} match(es).", parent=self)
+            self.pdf_text.see(f"1.0+{spans[0][0]-100}c")
+            messagebox.showinfo("Success!", f"Found {len(spans)} match(es).", parent=self)
         except re.error as e:
             messagebox.showerror("Invalid Pattern", f"The regular expression is invalid:\n{e}", parent=self)
+        except TimeoutError:
+            messagebox.showwarning("Pattern Too Slow", f"The pattern took more than {pattern_registry.PATTERN_TIMEOUT_SECONDS}s on this text "
+                                   "and would be quarantined while harvesting. Try making it more specific.", parent=self)
             
     def on_suggest_pattern(self):
         try:
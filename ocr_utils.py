@@ -1,32 +1,155 @@
 # ocr_utils.py
+from __future__ import annotations
+
 import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
-import io
+from typing import NamedTuple
 
+from config import OCR_OMP_THREAD_LIMIT
+from cache_utils import hash_bytes, make_cache_key
 from custom_exceptions import PDFExtractionError
+from image_preprocessing import preprocess_image
+from pipeline import ordered_map
+from text_quality import score_text
 from file_utils import find_tesseract_executable
 
 # Configure logging
 logger = logging.getLogger("app.ocr")
 
-# Find Tesseract at startup
-try:
-    TESSERACT_PATH = find_tesseract_executable()
-    pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
-    TESSERACT_AVAILABLE = True
-    logger.info(f"Tesseract OCR found at: {TESSERACT_PATH}")
-except FileNotFoundError:
-    TESSERACT_AVAILABLE = False
-    logger.warning("Tesseract OCR executable not found. Text extraction will be limited.")
-
-def _open_pdf(pdf_path: Path):
-    """Safely opens a PDF, handling passwords and corruption."""
+# Extraction settings. Anything that changes the extracted text belongs here
+# so cached results are invalidated when it changes.
+EXTRACTOR_VERSION = 3
+OCR_DPI = 300
+# Adaptive DPI (the "adaptive_dpi" job option): scanned pages are OCR'd at
+# OCR_LOW_DPI first and only pages whose mean word confidence (0-100) is
+# below OCR_MIN_CONFIDENCE are rendered and OCR'd again at OCR_DPI.
+OCR_LOW_DPI = 150
+OCR_MIN_CONFIDENCE = 70
+OCR_LANGUAGE = 'eng'
+# A page whose text layer is shorter than this, or has fewer printable
+# characters than MIN_PRINTABLE_RATIO, is treated as scanned and OCR'd.
+MIN_PAGE_TEXT_LENGTH = 50
+MIN_PRINTABLE_RATIO = 0.9
+# Text layers scoring below this in text_quality.score_text (mojibake,
+# glyph-ID noise) are OCR'd as well.
+MIN_TEXT_QUALITY = 0.5
+
+# A page whose only content is one upright image covering at least this
+# share of the page is OCR'd from the embedded image at its native
+# resolution instead of being rendered.
+DIRECT_SCAN_MIN_COVERAGE = 0.8
+
+# Page segmentation mode for region-of-interest OCR: each region is read as
+# a single uniform block of text.
+OCR_ROI_PSM = 6
+
+# Scanned pages are sent to Tesseract in chunks of this many pages, so one
+# process start-up and one traineddata load cover the whole chunk.
+OCR_BATCH_SIZE = 8
+
+PAGE_SOURCE_TEXT = "text"
+PAGE_SOURCE_OCR = "ocr"
+
+class ExtractedText(NamedTuple):
+    """
+    Text of a PDF plus where each page's text came from ("text" or "ocr")
+    and the quality score of each page's text layer (see page_text_quality).
+    """
+    text: str
+    page_sources: list
+    page_quality: list = None
+
+class PageText(NamedTuple):
+    """One page from iter_pdf_pages; number is zero-based, quality scores its text layer."""
+    number: int
+    text: str
+    source: str
+    page_count: int
+    quality: float = 0.0
+
+class TesseractInfo(NamedTuple):
+    """The Tesseract executable this process uses, its version and installed languages."""
+    path: str
+    version: str
+    languages: tuple
+
+# Tesseract is looked up on first use rather than at import, once per
+# process. False means it was looked for and not found.
+_tesseract = None
+_tesseract_lock = threading.Lock()
+
+def _probe_tesseract():
+    try:
+        path = find_tesseract_executable()
+    except FileNotFoundError:
+        logger.warning("Tesseract OCR executable not found. Text extraction will be limited.")
+        return False
+    pytesseract.pytesseract.tesseract_cmd = path
     try:
-        pdf_document = fitz.open(pdf_path)
+        version = str(pytesseract.get_tesseract_version())
+        languages = tuple(sorted(pytesseract.get_languages(config='')))
+    except (pytesseract.TesseractError, pytesseract.TesseractNotFoundError, OSError) as e:
+        logger.warning(f"Tesseract at {path} could not be run: {e}")
+        return False
+    info = TesseractInfo(path, version, languages)
+    logger.info(f"Tesseract OCR {version} found at: {path} (languages: {', '.join(languages) or 'none'})")
+    if OCR_LANGUAGE not in languages:
+        logger.warning(f"Tesseract language '{OCR_LANGUAGE}' is not installed; OCR will fail.")
+    return info
+
+def get_tesseract_info():
+    """Returns the TesseractInfo for this process, or None when Tesseract is unavailable."""
+    global _tesseract
+    if _tesseract is None:
+        with _tesseract_lock:
+            if _tesseract is None:
+                _tesseract = _probe_tesseract()
+    return _tesseract or None
+
+def seed_tesseract_info(info):
+    """
+    Installs Tesseract details found by another process (None when it was
+    not found), so pool workers skip the lookup. Used as a pool initializer.
+    """
+    global _tesseract
+    _tesseract = info or False
+    if info:
+        pytesseract.pytesseract.tesseract_cmd = info.path
+
+def tesseract_available() -> bool:
+    """Returns True when Tesseract was found; looks it up on the first call."""
+    return get_tesseract_info() is not None
+
+def __getattr__(name):
+    # TESSERACT_AVAILABLE and TESSERACT_PATH used to be set at import time.
+    if name == "TESSERACT_AVAILABLE":
+        return tesseract_available()
+    if name == "TESSERACT_PATH":
+        info = get_tesseract_info()
+        return info.path if info else None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _open_pdf(pdf_path: Path, stream: bytes = None):
+    """
+    Safely opens a PDF, handling passwords and corruption.
+    When stream holds the file's bytes the document is opened from memory
+    and pdf_path is only used for messages.
+    """
+    try:
+        if stream is not None:
+            pdf_document = fitz.open(stream=stream, filetype="pdf")
+        else:
+            pdf_document = fitz.open(pdf_path)
         if pdf_document.is_encrypted and not pdf_document.authenticate(''):
+            pdf_document.close()
             logger.warning(f"'{pdf_path.name}' is password-protected and could not be opened.")
             raise PDFExtractionError(f"File '{pdf_path.name}' is encrypted.")
         return pdf_document
@@ -37,40 +160,405 @@ def _open_pdf(pdf_path: Path):
         logger.error(f"General error opening '{pdf_path.name}': {e}")
         raise PDFExtractionError(f"Could not open '{pdf_path.name}'.")
 
-def get_text_from_pdf(pdf_path: Path) -> str:
+def get_extraction_settings() -> dict:
+    """Returns the settings that determine the output of get_text_from_pdf."""
+    info = get_tesseract_info()
+    return {
+        "version": EXTRACTOR_VERSION,
+        "dpi": OCR_DPI,
+        "colorspace": "gray",
+        "low_dpi": OCR_LOW_DPI,
+        "min_confidence": OCR_MIN_CONFIDENCE,
+        "direct_scan_coverage": DIRECT_SCAN_MIN_COVERAGE,
+        "language": OCR_LANGUAGE,
+        "min_page_text": MIN_PAGE_TEXT_LENGTH,
+        "min_printable_ratio": MIN_PRINTABLE_RATIO,
+        "min_text_quality": MIN_TEXT_QUALITY,
+        "ocr_available": info is not None,
+        "tesseract_version": info.version if info else None,
+    }
+
+def page_text_quality(page_text: str) -> float:
+    """Scores a page's text layer from 0 to 1; layers too short to judge score 0."""
+    stripped = page_text.strip()
+    if len(stripped) < MIN_PAGE_TEXT_LENGTH:
+        return 0.0
+    return score_text(stripped).score
+
+def page_needs_ocr(page_text: str, quality: float = None) -> bool:
     """
-    Extracts text from a PDF. It first tries to get embedded text.
-    If that fails or returns little text, and Tesseract is available,
-    it performs OCR on the document images.
+    Returns True when a page's text layer is too sparse or too garbled to
+    trust. quality is the page's page_text_quality when already known.
     """
-    full_text = []
-    pdf_document = _open_pdf(pdf_path)
+    stripped = page_text.strip()
+    if len(stripped) < MIN_PAGE_TEXT_LENGTH:
+        return True
+    printable = sum(1 for ch in stripped if ch.isprintable() or ch.isspace())
+    if printable / len(stripped) < MIN_PRINTABLE_RATIO:
+        return True
+    if quality is None:
+        quality = page_text_quality(stripped)
+    return quality < MIN_TEXT_QUALITY
 
-    # First, try to extract embedded text
-    for page_num in range(len(pdf_document)):
-        page = pdf_document.load_page(page_num)
-        full_text.append(page.get_text())
+def _pixmap_to_image(pix) -> Image.Image:
+    """Wraps a pixmap's raw samples in a PIL image without encoding it first."""
+    mode = {1: "L", 3: "RGB", 4: "RGBA"}[pix.n]
+    return Image.frombuffer(mode, (pix.width, pix.height), pix.samples, "raw", mode, pix.stride, 1)
 
-    embedded_text = "\n".join(full_text).strip()
+def _render_page(page, dpi: int = OCR_DPI, clip=None) -> Image.Image:
+    """
+    Renders a page (or just the clip rectangle of it) for OCR as an 8-bit
+    grayscale image. Tesseract binarizes the input anyway, and one channel
+    without alpha is a third of the size of an RGB render.
+    """
+    pix = page.get_pixmap(dpi=dpi, clip=clip, colorspace=fitz.csGRAY, alpha=False)
+    return _pixmap_to_image(pix)
 
-    # If embedded text is sparse and OCR is available, perform OCR
-    if len(embedded_text) < 100 and TESSERACT_AVAILABLE:
-        logger.info(f"Embedded text for '{pdf_path.name}' is minimal. Attempting OCR.")
-        ocr_text = []
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            pix = page.get_pixmap(dpi=300)  # Higher DPI for better OCR
-            img = Image.open(io.BytesIO(pix.tobytes()))
-            try:
-                text = pytesseract.image_to_string(img, lang='eng')
-                ocr_text.append(text)
-            except pytesseract.TesseractError as e:
-                logger.error(f"Tesseract failed on page {page_num+1} of {pdf_path.name}: {e}")
-        
-        return "\n".join(ocr_text)
+def _embedded_scan_xref(page):
+    """
+    Returns the xref of the image when the page is a plain scan: exactly one
+    image, placed once, upright, covering most of the page, with no vector
+    drawings on top. Returns None for anything else, which is rendered.
+    """
+    images = page.get_images(full=True)
+    if len(images) != 1 or page.rotation:
+        return None
+    xref = images[0][0]
+    placements = page.get_image_rects(xref, transform=True)
+    if len(placements) != 1:
+        return None
+    rect, matrix = placements[0]
+    if matrix.b or matrix.c or matrix.a <= 0 or matrix.d <= 0:
+        return None
+    if (rect & page.rect).get_area() < DIRECT_SCAN_MIN_COVERAGE * page.rect.get_area():
+        return None
+    if page.get_cdrawings():
+        return None
+    return xref
+
+def _embedded_image(pdf_document, xref: int) -> Image.Image:
+    """Decodes an embedded image at its native resolution as grayscale without alpha."""
+    pix = fitz.Pixmap(pdf_document, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.n > 1:
+        pix = fitz.Pixmap(fitz.csGRAY, pix)
+    return _pixmap_to_image(pix)
+
+def _run_tesseract(source, with_confidence: bool = False):
+    """
+    Runs Tesseract on an image or a list file. Returns (text, tsv); the TSV
+    with word confidences is only produced when with_confidence is set, in
+    the same run as the text.
+    """
+    if with_confidence:
+        text, tsv = pytesseract.run_and_get_multiple_output(source, extensions=["txt", "tsv"], lang=OCR_LANGUAGE)
+        return text, tsv
+    return pytesseract.image_to_string(source, lang=OCR_LANGUAGE), None
+
+def _page_confidences(tsv: str, page_count: int) -> list:
+    """Mean word confidence of each page in Tesseract TSV output; None for pages without words."""
+    scores = [[] for _ in range(page_count)]
+    lines = tsv.splitlines()
+    if not lines:
+        return [None] * page_count
+    header = lines[0].split("\t")
+    for line in lines[1:]:
+        row = dict(zip(header, line.split("\t")))
+        try:
+            page_index = int(row["page_num"]) - 1
+            confidence = float(row["conf"])
+        except (KeyError, ValueError):
+            continue
+        if confidence >= 0 and row.get("text", "").strip() and 0 <= page_index < page_count:
+            scores[page_index].append(confidence)
+    return [sum(s) / len(s) if s else None for s in scores]
+
+def _ocr_image(img: Image.Image, page_label: str, with_confidence: bool = False) -> tuple:
+    """Runs Tesseract on one rendered page. Returns (text, confidence), ("", None) if Tesseract fails."""
+    try:
+        text, tsv = _run_tesseract(img, with_confidence)
+    except pytesseract.TesseractError as e:
+        logger.error(f"Tesseract failed on {page_label}: {e}")
+        return "", None
+    return text, _page_confidences(tsv, 1)[0] if tsv is not None else None
+
+def _ocr_batch(images: list, with_confidence: bool = False) -> list:
+    """
+    OCRs several images with one Tesseract run and returns (text, confidence)
+    per image. The images are written uncompressed to a temporary folder and
+    passed as a list file; Tesseract ends every page with a form feed, which
+    is used to split the output.
+    """
+    with tempfile.TemporaryDirectory(prefix="kyo_ocr_") as temp_dir:
+        temp_dir = Path(temp_dir)
+        image_paths = []
+        for i, img in enumerate(images):
+            image_path = temp_dir / f"page_{i:04d}.pnm"
+            img.save(image_path)
+            image_paths.append(str(image_path))
+        list_path = temp_dir / "pages.txt"
+        list_path.write_text("\n".join(image_paths) + "\n", encoding="utf-8")
+        output, tsv = _run_tesseract(str(list_path), with_confidence)
+    if output.count("\f") < len(images):
+        return []
+    texts = output.split("\f")[:len(images)]
+    confidences = _page_confidences(tsv, len(images)) if tsv is not None else [None] * len(images)
+    return list(zip(texts, confidences))
+
+def _ocr_image_key(img: Image.Image, with_confidence: bool, preprocess=()) -> str:
+    """Cache key for the OCR result of a page bitmap under the current OCR settings."""
+    image_hash = hash_bytes(f"{img.mode}:{img.size}:".encode('utf-8') + img.tobytes())
+    return make_cache_key(image_hash, {"language": OCR_LANGUAGE, "confidence": with_confidence, "preprocess": list(preprocess)})
+
+def _preprocessed(images: list, preprocess) -> list:
+    """Runs the image_preprocessing steps on each page image."""
+    return [preprocess_image(img, preprocess) for img in images] if preprocess else images
 
-    if not embedded_text:
+def _ocr_images(page_numbers: list, images: list, pdf_name: str, with_confidence: bool = False, ocr_cache=None, preprocess=()) -> list:
+    """
+    OCRs a chunk of rendered pages and returns (text, confidence) per page.
+    With an ocr_cache, pages whose bitmap was OCR'd before are answered from
+    it without running Tesseract. Only touches the images, so it is safe to
+    call from a thread. The preprocess steps run only on pages that are
+    actually OCR'd.
+    """
+    if ocr_cache is None:
+        return _ocr_uncached(page_numbers, _preprocessed(images, preprocess), pdf_name, with_confidence)
+    keys = [_ocr_image_key(img, with_confidence, preprocess) for img in images]
+    results = []
+    for key in keys:
+        cached = ocr_cache.get(key)
+        results.append((cached["text"], cached["confidence"]) if cached is not None else None)
+    # Identical pages within the chunk are OCR'd once.
+    todo = {}
+    for i, result in enumerate(results):
+        if result is None:
+            todo.setdefault(keys[i], i)
+    if todo:
+        indexes = list(todo.values())
+        fresh = _ocr_uncached([page_numbers[i] for i in indexes], _preprocessed([images[i] for i in indexes], preprocess), pdf_name, with_confidence)
+        by_key = dict(zip(todo, fresh))
+        for key, (text, confidence) in by_key.items():
+            # An empty result may be a Tesseract failure, so it is not kept.
+            if text.strip():
+                ocr_cache.put(key, {"text": text, "confidence": confidence})
+        results = [result if result is not None else by_key[key] for result, key in zip(results, keys)]
+    return results
+
+def _ocr_uncached(page_numbers: list, images: list, pdf_name: str, with_confidence: bool = False) -> list:
+    """
+    OCRs a chunk of rendered pages in one Tesseract run, falling back to one
+    run per page if the batch fails or its output cannot be split back into
+    pages. Returns (text, confidence) per page.
+    """
+    labels = [f"page {n + 1} of {pdf_name}" for n in page_numbers]
+    if len(images) == 1:
+        return [_ocr_image(images[0], labels[0], with_confidence)]
+    try:
+        results = _ocr_batch(images, with_confidence)
+        if len(results) == len(images):
+            return results
+        logger.warning(f"Batched OCR of {pdf_name} returned the wrong number of pages; retrying page by page.")
+    except (pytesseract.TesseractError, OSError) as e:
+        logger.warning(f"Batched OCR of {pdf_name} failed ({e}); retrying page by page.")
+    return [_ocr_image(img, label, with_confidence) for img, label in zip(images, labels)]
+
+def _limit_tesseract_threads():
+    """Caps OpenMP inside each Tesseract process so concurrent pages do not oversubscribe the CPU."""
+    if OCR_OMP_THREAD_LIMIT and "OMP_THREAD_LIMIT" not in os.environ:
+        os.environ["OMP_THREAD_LIMIT"] = str(OCR_OMP_THREAD_LIMIT)
+
+def _ocr_pass(page_numbers: list, pdf_name: str, render, executor, ocr_threads: int, with_confidence: bool = False, ocr_cache=None, preprocess=()):
+    """
+    Yields (page_number, (text, confidence)) for the given pages in order.
+    render(page_number) produces each page image on the calling thread,
+    since MuPDF documents are not thread safe, and the chunks are OCR'd on
+    the executor when one is given. Chunks are made smaller than
+    OCR_BATCH_SIZE when that keeps every thread busy, and only a few are
+    rendered ahead so memory stays bounded.
+    """
+    chunk_size = max(1, min(OCR_BATCH_SIZE, -(-len(page_numbers) // ocr_threads)))
+
+    def rendered_chunks():
+        for start in range(0, len(page_numbers), chunk_size):
+            chunk = page_numbers[start:start + chunk_size]
+            yield chunk, [render(n) for n in chunk]
+
+    def ocr_chunk(chunk):
+        return _ocr_images(chunk[0], chunk[1], pdf_name, with_confidence, ocr_cache, preprocess)
+
+    for (chunk_pages, _), future in ordered_map(ocr_chunk, rendered_chunks(), executor, window=ocr_threads * 2):
+        yield from zip(chunk_pages, future.result())
+
+def _renderer(pdf_document, dpi: int):
+    """Returns a render(page_number) function for _ocr_pass at the given DPI."""
+    return lambda page_num: _render_page(pdf_document.load_page(page_num), dpi)
+
+def _ocr_adaptive(pdf_document, ocr_queue: list, pdf_name: str, executor, ocr_threads: int, ocr_cache=None, preprocess=()) -> dict:
+    """
+    OCRs the pages at OCR_LOW_DPI first and re-OCRs at OCR_DPI only the pages
+    whose mean word confidence is below OCR_MIN_CONFIDENCE (or that gave no
+    words at all). Returns {page_number: text} and logs the pages per DPI
+    tier with the time saved against OCR'ing every page at OCR_DPI.
+    """
+    start = time.perf_counter()
+    low = dict(_ocr_pass(ocr_queue, pdf_name, _renderer(pdf_document, OCR_LOW_DPI), executor, ocr_threads, True, ocr_cache, preprocess))
+    low_seconds = time.perf_counter() - start
+    texts = {n: text for n, (text, _) in low.items()}
+
+    retry = [n for n in ocr_queue if low[n][1] is None or low[n][1] < OCR_MIN_CONFIDENCE]
+    high_seconds = 0.0
+    if retry:
+        start = time.perf_counter()
+        high = _ocr_pass(retry, pdf_name, _renderer(pdf_document, OCR_DPI), executor, ocr_threads, False, ocr_cache, preprocess)
+        texts.update((n, text) for n, (text, _) in high)
+        high_seconds = time.perf_counter() - start
+
+    # Without escalated pages to time, scale the low-DPI time by the pixel count.
+    high_per_page = high_seconds / len(retry) if retry else low_seconds / len(ocr_queue) * (OCR_DPI / OCR_LOW_DPI) ** 2
+    saved = high_per_page * len(ocr_queue) - (low_seconds + high_seconds)
+    logger.info(
+        f"Adaptive OCR of '{pdf_name}': {len(ocr_queue) - len(retry)} pages at {OCR_LOW_DPI} DPI, "
+        f"{len(retry)} re-OCR'd at {OCR_DPI} DPI; about {saved:.1f}s saved versus {OCR_DPI} DPI only."
+    )
+    return texts
+
+def _ocr_queued_pages(pdf_document, ocr_queue: list, pdf_name: str, ocr_threads: int = 1, ocr_cache=None, preprocess=(),
+                      adaptive_dpi: bool = False):
+    """
+    Yields (page_number, text) for the queued pages in page order, OCR'ing
+    up to ocr_threads chunks at a time. Plain scans are OCR'd from their
+    embedded image; the remaining pages are rendered, using the adaptive
+    low/high DPI passes when adaptive_dpi is on.
+    """
+    ocr_threads = max(1, min(ocr_threads, len(ocr_queue)))
+    scan_xrefs = {}
+    for page_num in ocr_queue:
+        xref = _embedded_scan_xref(pdf_document.load_page(page_num))
+        if xref is not None:
+            scan_xrefs[page_num] = xref
+    rendered = [n for n in ocr_queue if n not in scan_xrefs]
+
+    executor = None
+    if ocr_threads > 1:
+        _limit_tesseract_threads()
+        executor = ThreadPoolExecutor(max_workers=ocr_threads, thread_name_prefix="ocr")
+    try:
+        texts = {}
+        if scan_xrefs:
+            embedded = _ocr_pass(list(scan_xrefs), pdf_name, lambda n: _embedded_image(pdf_document, scan_xrefs[n]), executor, ocr_threads, False, ocr_cache, preprocess)
+            texts.update((n, text) for n, (text, _) in embedded)
+            logger.info(f"OCR'd {len(scan_xrefs)} pages of '{pdf_name}' from their embedded scan images.")
+        if rendered and adaptive_dpi and OCR_LOW_DPI < OCR_DPI:
+            texts.update(_ocr_adaptive(pdf_document, rendered, pdf_name, executor, ocr_threads, ocr_cache, preprocess))
+        elif rendered:
+            texts.update((n, text) for n, (text, _) in _ocr_pass(rendered, pdf_name, _renderer(pdf_document, OCR_DPI), executor, ocr_threads, False, ocr_cache, preprocess))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    yield from ((n, texts[n]) for n in ocr_queue)
+
+def iter_pdf_pages(pdf_path: Path, stream: bytes = None, ocr_threads: int = 1, lookahead: int = None, ocr_cache=None, preprocess=(),
+                   adaptive_dpi: bool = False):
+    """
+    Yields a PageText for every page of a PDF in order, OCR'ing the pages
+    whose text layer is not usable (see extract_text_with_sources).
+    Pages are read a window at a time so scanned pages can still be OCR'd in
+    batches. By default the window is the whole document; with lookahead it
+    starts at that many pages and doubles up to OCR_BATCH_SIZE, so a caller
+    that stops after the first pages does not pay for OCR of the rest.
+    ocr_cache (a cache_utils.DiskCache) reuses OCR results of identical
+    page bitmaps; preprocess names image_preprocessing steps applied to
+    page images before OCR; adaptive_dpi OCRs rendered pages at OCR_LOW_DPI
+    first (see _ocr_adaptive). The document is closed when the generator is
+    exhausted or closed.
+    """
+    pdf_document = _open_pdf(pdf_path, stream)
+    try:
+        page_count = len(pdf_document)
+        window = lookahead or page_count
+        start = 0
+        while start < page_count:
+            page_numbers = range(start, min(start + window, page_count))
+            texts = {n: pdf_document.load_page(n).get_text() for n in page_numbers}
+            sources = dict.fromkeys(page_numbers, PAGE_SOURCE_TEXT)
+            quality = {n: page_text_quality(texts[n]) for n in page_numbers}
+            ocr_queue = [n for n in page_numbers if tesseract_available() and page_needs_ocr(texts[n], quality[n])]
+            for page_num, ocr_text in _ocr_queued_pages(pdf_document, ocr_queue, pdf_path.name, ocr_threads, ocr_cache, preprocess,
+                                                        adaptive_dpi):
+                if ocr_text.strip() or not texts[page_num].strip():
+                    texts[page_num] = ocr_text
+                    sources[page_num] = PAGE_SOURCE_OCR
+            for page_num in page_numbers:
+                yield PageText(page_num, texts[page_num], sources[page_num], page_count, quality[page_num])
+            start += window
+            if lookahead:
+                window = min(window * 2, max(OCR_BATCH_SIZE, lookahead))
+    finally:
+        pdf_document.close()
+
+def extract_text_with_sources(pdf_path: Path, stream: bytes = None, ocr_threads: int = 1, ocr_cache=None, preprocess=(),
+                              adaptive_dpi: bool = False) -> ExtractedText:
+    """
+    Extracts text from a PDF page by page. Pages with a usable embedded text
+    layer keep it; only pages whose layer is sparse or garbled are OCR'd
+    (when Tesseract is available), so a typed cover page with scanned
+    attachments gets both. Pass the file's bytes as stream to avoid reading
+    it from disk again. ocr_threads, ocr_cache, preprocess and adaptive_dpi
+    are described in iter_pdf_pages.
+    """
+    pages = list(iter_pdf_pages(pdf_path, stream, ocr_threads, ocr_cache=ocr_cache, preprocess=preprocess,
+                                adaptive_dpi=adaptive_dpi))
+    page_sources = [page.source for page in pages]
+    page_quality = [page.quality for page in pages]
+
+    ocr_pages = page_sources.count(PAGE_SOURCE_OCR)
+    if ocr_pages:
+        logger.info(f"OCR'd {ocr_pages} of {len(page_sources)} pages of '{pdf_path.name}'.")
+
+    text = "\n".join(page.text for page in pages).strip()
+    # An empty result only means failure when OCR was not even attempted.
+    if not text and not (tesseract_available() and pages):
         logger.warning(f"Failed to extract any text from '{pdf_path.name}'.")
         raise PDFExtractionError(f"No text could be extracted from '{pdf_path.name}'.")
 
-    return embedded_text
\ No newline at end of file
+    return ExtractedText(text, page_sources, page_quality)
+
+def ocr_regions(pdf_path: Path, regions: list, stream: bytes = None, page_number: int = 0, preprocess=()):
+    """
+    OCRs only the given regions of one page, each as a single block of text.
+    Regions are (x0, y0, x1, y1) fractions of the page. Returns None when
+    the page has a usable text layer or OCR is unavailable, since there is
+    nothing to save then.
+    """
+    if not tesseract_available():
+        return None
+    pdf_document = _open_pdf(pdf_path, stream)
+    try:
+        if page_number >= len(pdf_document):
+            return None
+        page = pdf_document.load_page(page_number)
+        if not page_needs_ocr(page.get_text()):
+            return None
+
+        area = page.rect
+        texts = []
+        for x0, y0, x1, y1 in regions:
+            clip = fitz.Rect(area.x0 + x0 * area.width, area.y0 + y0 * area.height,
+                             area.x0 + x1 * area.width, area.y0 + y1 * area.height)
+            img = preprocess_image(_render_page(page, OCR_DPI, clip), preprocess)
+            try:
+                texts.append(pytesseract.image_to_string(img, lang=OCR_LANGUAGE, config=f"--psm {OCR_ROI_PSM}"))
+            except pytesseract.TesseractError as e:
+                logger.error(f"Tesseract failed on a region of page {page_number + 1} of {pdf_path.name}: {e}")
+        return "\n".join(texts).strip()
+    finally:
+        pdf_document.close()
+
+def get_text_from_pdf(pdf_path: Path, stream: bytes = None, ocr_threads: int = 1) -> str:
+    """
+    Extracts text from a PDF, using the embedded text layer where it is
+    usable and OCR for the remaining pages. See extract_text_with_sources.
+    """
+    return extract_text_with_sources(pdf_path, stream, ocr_threads).text
@@ -0,0 +1,741 @@
+# pattern_registry.py
+# Compiles the harvest patterns once and recompiles them when custom_patterns.py changes.
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import runpy
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+import config
+
+logger = logging.getLogger("app.patterns")
+
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE
+# Exclusions and standardization rules are applied to single harvested values.
+VALUE_FLAGS = re.IGNORECASE
+# Literal prefilter: a pattern is skipped for a text that contains none of
+# its required literals. Shorter literals are too common to be worth it.
+MIN_LITERAL_LENGTH = 3
+# Scanner regexes kept per scanner for the sets of patterns left after the
+# prefilter; documents of one kind tend to leave the same set.
+SCANNER_REGEX_CACHE_SIZE = 32
+# Standardized values remembered per pattern set; the same model and part
+# strings come up over and over within a batch.
+STANDARDIZE_CACHE_SIZE = 4096
+CUSTOM_PATTERNS_PATH = config.BASE_DIR / 'custom_patterns.py'
+# Patterns that ran out of time, left out of harvesting until released.
+QUARANTINE_PATH = config.CACHE_DIR / 'pattern_quarantine.json'
+PATTERN_TIMEOUT_SECONDS = config.PATTERN_TIMEOUT_SECONDS
+
+# Pattern lists read from custom_patterns.py, in the order they are hashed.
+PATTERN_LISTS = [
+    "MODEL_PATTERNS",
+    "PART_NUMBER_PATTERNS",
+    "SERIAL_NUMBER_PATTERNS",
+    "QA_NUMBER_PATTERNS",
+    "DOCUMENT_TYPE_PATTERNS",
+    "DOCUMENT_TITLE_PATTERNS",
+    "REVISION_PATTERNS",
+    "LANGUAGE_PATTERNS",
+    "EXCLUSION_PATTERNS",
+]
+
+
+@lru_cache(maxsize=1024)
+def compile_pattern(pattern: str, flags: int = PATTERN_FLAGS):
+    """Compiles a harvest pattern, by default with the harvest flags; raises re.error when invalid."""
+    return re.compile(pattern, flags)
+
+
+def _serve(conn):
+    """Loop of the match process: answers _MatchWorker requests until the pipe is closed."""
+    conn.send(("ready", None))
+    scanners = OrderedDict()
+    while True:
+        try:
+            kind, pattern, flags, text = conn.recv()
+        except EOFError:
+            return
+        try:
+            if kind == "scan":
+                # pattern holds the scanner's groups as ((key, (pattern, ...)), ...).
+                scanner = scanners.pop(pattern, None) or MultiPatternScanner(
+                    {key: [compile_pattern(p, flags) for p in patterns] for key, patterns in pattern}, flags)
+                scanners[pattern] = scanner
+                if len(scanners) > SCANNER_REGEX_CACHE_SIZE:
+                    scanners.popitem(last=False)
+                stats = Counter()
+                result = scanner.scan(text, stats), stats
+            elif kind == "findall":
+                result = compile_pattern(pattern, flags).findall(text)
+            else:
+                result = [match.span() for match in compile_pattern(pattern, flags).finditer(text)]
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", e))
+
+
+class _MatchWorker:
+    """
+    A child process that runs re for the guarded calls. re cannot be
+    interrupted, so a call that runs out of time is stopped by killing the
+    process; the next call starts a new one.
+    """
+
+    START_TIMEOUT = 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process = None
+        self._conn = None
+
+    def _start(self):
+        context = multiprocessing.get_context("spawn")
+        self._conn, child = context.Pipe()
+        self._process = context.Process(target=_serve, args=(child,), name="pattern-matcher",
+                                        daemon=not multiprocessing.current_process().daemon)
+        self._process.start()
+        child.close()
+        # Wait for the imports so they do not count against the first call's time limit.
+        if not self._conn.poll(self.START_TIMEOUT):
+            self._stop()
+            raise OSError("The pattern match process did not start.")
+        self._conn.recv()
+
+    def stop(self):
+        with self._lock:
+            self._stop()
+
+    def _stop(self):
+        if self._process is not None:
+            self._conn.close()
+            self._process.kill()
+            self._process.join()
+            self._process = None
+
+    def run(self, request: tuple, timeout: float):
+        """
+        Sends a (kind, pattern, flags, text) request to the process; raises
+        TimeoutError (and kills it) when no answer comes within timeout.
+        """
+        with self._lock:
+            if self._process is None or not self._process.is_alive():
+                self._stop()
+                self._start()
+            self._conn.send(request)
+            if not self._conn.poll(timeout):
+                self._stop()
+                raise TimeoutError(f"Matching took more than {timeout}s")
+            status, result = self._conn.recv()
+        if status == "error":
+            raise result
+        return result
+
+    def _forget(self):
+        # A forked child must not share the parent's process and pipe.
+        self.__init__()
+
+
+_worker = _MatchWorker()
+atexit.register(_worker.stop)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_worker._forget)
+
+
+def _in_worker(request: tuple, timeout: float, local):
+    """
+    Runs request in the match process under timeout (0 for no limit). When
+    there is no limit or the process cannot be used, local() is returned
+    instead.
+    """
+    if timeout:
+        try:
+            return _worker.run(request, timeout)
+        except TimeoutError:
+            raise
+        except (OSError, EOFError) as e:
+            logger.warning(f"Pattern match process unavailable ({e}); matching without a time limit.")
+    return local()
+
+
+def _guarded(kind: str, pattern, text: str, timeout: float):
+    timeout = PATTERN_TIMEOUT_SECONDS if timeout is None else timeout
+    if kind == "findall":
+        local = lambda: pattern.findall(text)  # noqa: E731
+    else:
+        local = lambda: [match.span() for match in pattern.finditer(text)]  # noqa: E731
+    try:
+        return _in_worker((kind, pattern.pattern, pattern.flags, text), timeout, local)
+    except TimeoutError:
+        raise TimeoutError(f"'{pattern.pattern}' took more than {timeout}s") from None
+
+
+def guarded_findall(pattern, text: str, timeout: float = None) -> list:
+    """
+    findall that raises TimeoutError when matching takes more than timeout
+    seconds (PATTERN_TIMEOUT_SECONDS by default, 0 for no limit). The
+    pattern runs with re in the match process, which is killed when the
+    time is up, so the results are exactly re's and the limit always holds.
+    """
+    return _guarded("findall", pattern, text, timeout)
+
+
+def guarded_spans(pattern, text: str, timeout: float = None) -> list:
+    """The (start, end) span of every match, under the time limit of guarded_findall."""
+    return _guarded("spans", pattern, text, timeout)
+
+
+def _first_value(match):
+    # findall gives a tuple for patterns with several groups: keep the first non-empty one.
+    return next((item for item in match if item), None) if isinstance(match, tuple) else match
+
+
+def _ops(parsed):
+    """Yields every opcode of a parsed pattern, descending into groups, branches and repeats."""
+    for op, av in parsed:
+        yield op
+        for value in av if isinstance(av, (tuple, list)) else (av,):
+            for item in value if isinstance(value, list) else (value,):
+                if isinstance(item, sre_parse.SubPattern):
+                    yield from _ops(item)
+
+
+_UNBOUNDED = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+
+
+def _repeats_ambiguously(parsed, inside_repeat=False) -> bool:
+    for op, av in parsed:
+        if op in _UNBOUNDED and av[1] > 1:
+            if inside_repeat or _repeats_ambiguously(av[2], True):
+                return True
+        elif op == sre_parse.BRANCH:
+            if inside_repeat or any(_repeats_ambiguously(branch, inside_repeat) for branch in av[1]):
+                return True
+        elif op == sre_parse.SUBPATTERN:
+            if _repeats_ambiguously(av[-1], inside_repeat):
+                return True
+        elif op == _ATOMIC_GROUP and _repeats_ambiguously(av, inside_repeat):
+            return True
+    return False
+
+
+@lru_cache(maxsize=1024)
+def may_backtrack(pattern) -> bool:
+    """
+    True for patterns shaped like the ones behind catastrophic backtracking:
+    a repeat inside another repeat, or an alternation inside a repeat
+    (e.g. (a+)+ or (a|aa)*). Used to warn about such user patterns.
+    """
+    try:
+        return _repeats_ambiguously(sre_parse.parse(pattern.pattern, pattern.flags))
+    except re.error:
+        return False
+
+
+def _scans_alone(pattern, flags: int) -> bool:
+    """
+    True for patterns the MultiPatternScanner cannot embed without changing
+    their matches: ones compiled with other flags, that can match the empty
+    string, or that use backreferences, named groups or inline flags.
+    """
+    if pattern.flags & ~re.UNICODE != flags or pattern.groupindex:
+        return True
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+        re.compile(f"(?:{pattern.pattern})")
+    except re.error:
+        return True
+    if parsed.getwidth()[0] == 0:
+        return True
+    return any(op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS) for op in _ops(parsed))
+
+
+_REPEATS = tuple(op for op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, "POSSESSIVE_REPEAT", None)) if op)
+_ATOMIC_GROUP = getattr(sre_parse, "ATOMIC_GROUP", None)
+
+
+def _required_in(parsed):
+    """
+    Returns a set of lowercase ASCII literals at least one of which every
+    match of the parsed pattern contains, or None when none can be named.
+    Of the candidates in a sequence, the one whose shortest literal is
+    longest is kept.
+    """
+    candidates = []
+    run = []
+
+    def end_run():
+        if run:
+            candidates.append(frozenset(["".join(run)]))
+            run.clear()
+
+    for op, av in parsed:
+        if op == sre_parse.LITERAL and av < 128:
+            run.append(chr(av).lower())
+            continue
+        end_run()
+        if op == sre_parse.SUBPATTERN:
+            candidates.append(_required_in(av[-1]))
+        elif op == _ATOMIC_GROUP:
+            candidates.append(_required_in(av))
+        elif op in _REPEATS and av[0] >= 1:
+            candidates.append(_required_in(av[2]))
+        elif op == sre_parse.BRANCH:
+            alternatives = [_required_in(branch) for branch in av[1]]
+            if all(alternatives):
+                candidates.append(frozenset().union(*alternatives))
+    end_run()
+    candidates = [c for c in candidates if c and min(map(len, c)) >= MIN_LITERAL_LENGTH]
+    return max(candidates, key=lambda c: min(map(len, c)), default=None)
+
+
+@lru_cache(maxsize=1024)
+def required_literals(pattern):
+    """
+    The literals (lowercase) of which a compiled pattern needs at least one
+    in any text it matches, or None when it has no usable literal.
+    """
+    try:
+        return _required_in(sre_parse.parse(pattern.pattern, pattern.flags))
+    except re.error:
+        return None
+
+
+# Characters that IGNORECASE matches to an ASCII letter but str.lower() does not map to it.
+_CASE_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s"})
+
+
+def fold_text(text: str) -> str:
+    """Lowercases text for literal lookups the way IGNORECASE compares ASCII literals."""
+    if "İ" in text or "ı" in text or "ſ" in text:
+        text = text.translate(_CASE_FOLD)
+    return text.lower()
+
+
+def may_match(pattern, folded_text: str) -> bool:
+    """False when folded_text lacks all of the pattern's required literals."""
+    literals = required_literals(pattern)
+    return literals is None or any(literal in folded_text for literal in literals)
+
+
+def count_prefilter(stats: Counter, skipped: list, runs: int):
+    """Adds pattern runs and skips to stats; skips are also counted per pattern as ("pattern_skipped", pattern)."""
+    stats["pattern_runs"] += runs
+    stats["pattern_skips"] += len(skipped)
+    for pattern in skipped:
+        stats[("pattern_skipped", pattern.pattern)] += 1
+
+
+def _combine_exclusions(patterns):
+    """
+    Returns (combined, separate): one regex searching for any of the
+    exclusion patterns (None when there are none to combine) and the
+    patterns that must be searched on their own because their group
+    references or names would change meaning inside the alternation.
+    """
+    combinable, separate = [], []
+    for pattern in patterns:
+        try:
+            parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+            re.compile(f"(?:{pattern.pattern})", pattern.flags)
+        except re.error:
+            separate.append(pattern)
+            continue
+        if pattern.groupindex or any(op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS) for op in _ops(parsed)):
+            separate.append(pattern)
+        else:
+            combinable.append(pattern)
+    if not combinable:
+        return None, tuple(separate)
+    if len(combinable) == 1:
+        return combinable[0], tuple(separate)
+    return re.compile("|".join(f"(?:{p.pattern})" for p in combinable), VALUE_FLAGS), tuple(separate)
+
+
+def _starts_at_boundary(pattern) -> bool:
+    """True when the whole pattern starts with a \\b word-boundary assertion."""
+    if not pattern.pattern.startswith("\\b"):
+        return False
+    parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    return len(parsed) > 1 and parsed[0] == (sre_parse.AT, sre_parse.AT_BOUNDARY)
+
+
+class MultiPatternScanner:
+    """
+    Finds the matches of many patterns, grouped by key, in one walk of the
+    text. The patterns are joined into one regex of lookaheads: the search
+    stops only where at least one pattern matches, and there every pattern
+    is tried and its match captured. Keeping, per pattern, only matches that
+    start at or after the end of its previous one gives exactly what
+    findall would return for each pattern on its own. Patterns that cannot
+    be embedded that way are run with findall.
+
+    Before scanning, patterns whose required literals (see
+    required_literals) do not occur in the text are dropped. The guarded
+    patterns are scanned together in the match process under the
+    PATTERN_TIMEOUT_SECONDS limit for the document; when that runs out each
+    is run on its own under the guarded_findall limit to find the ones at
+    fault.
+    """
+
+    def __init__(self, groups: dict, flags: int = PATTERN_FLAGS, guarded=frozenset()):
+        self.keys = list(groups)
+        self.flags = flags
+        self._branches = []  # (key, pattern) joined into the scan regex
+        self._alone = []  # (key, pattern) run with findall
+        self._guarded = []  # (key, pattern) run with guarded_findall
+        for key, patterns in groups.items():
+            for pattern in patterns:
+                if pattern in guarded:
+                    self._guarded.append((key, pattern))
+                else:
+                    (self._alone if _scans_alone(pattern, flags) else self._branches).append((key, pattern))
+        self._regexes = OrderedDict()
+        self._lock = threading.Lock()
+        groups = {key: [pattern for k, pattern in self._guarded if k == key] for key in self.keys}
+        self._guarded_groups = tuple((key, tuple(p.pattern for p in patterns)) for key, patterns in groups.items())
+        self._guarded_scanner = MultiPatternScanner(groups, flags) if self._guarded else None
+
+    def _scan_guarded(self, text: str, folded: str, found: dict, stats: Counter, on_timeout):
+        def local():
+            local_stats = Counter()
+            return self._guarded_scanner.scan(text, local_stats), local_stats
+
+        try:
+            guarded_found, guarded_stats = _in_worker(("scan", self._guarded_groups, self.flags, text),
+                                                      PATTERN_TIMEOUT_SECONDS, local)
+        except TimeoutError:
+            logger.warning(f"Scanning with {len(self._guarded)} user patterns ran out of time; running them one by one.")
+            for index in self._prefilter(self._guarded, folded, stats):
+                key, pattern = self._guarded[index]
+                try:
+                    matches = guarded_findall(pattern, text)
+                except TimeoutError:
+                    if on_timeout:
+                        on_timeout(pattern)
+                    continue
+                found[key].extend(_first_value(match) for match in matches)
+            return
+        for key, values in guarded_found.items():
+            found[key].extend(values)
+        if stats is not None:
+            stats.update(guarded_stats)
+
+    def _build(self, branches):
+        """Returns the scan regex for the given branches and their (key, group, inner groups) slots."""
+        # The union comes first, so its copies of the inner groups are numbered first.
+        group = sum(pattern.groups for _, pattern in branches)
+        slots = []
+        for key, pattern in branches:
+            slots.append((key, group + 1, pattern.groups))
+            group += 1 + pattern.groups
+        # Word-boundary anchors are hoisted out of the union so most positions
+        # inside words are rejected by a single check.
+        alternatives, bounded = [], []
+        for _, pattern in branches:
+            if _starts_at_boundary(pattern):
+                bounded.append(f"(?:{pattern.pattern[2:]})")
+            else:
+                alternatives.append(f"(?:{pattern.pattern})")
+        if bounded:
+            alternatives.append(r"\b(?:" + "|".join(bounded) + ")")
+        union = "|".join(alternatives)
+        captures = "".join(f"(?:(?=({pattern.pattern}))|)" for _, pattern in branches)
+        return re.compile(f"(?={union}){captures}", self.flags), slots
+
+    def _regex_for(self, active: tuple):
+        with self._lock:
+            entry = self._regexes.get(active)
+            if entry is not None:
+                self._regexes.move_to_end(active)
+                return entry
+        entry = self._build([self._branches[i] for i in active])
+        with self._lock:
+            self._regexes[active] = entry
+            while len(self._regexes) > SCANNER_REGEX_CACHE_SIZE:
+                self._regexes.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _prefilter(candidates, folded, stats):
+        """Returns the indexes of the (key, pattern) candidates that may match, counting the rest."""
+        active, skipped = [], []
+        for index, (_, pattern) in enumerate(candidates):
+            if may_match(pattern, folded):
+                active.append(index)
+            else:
+                skipped.append(pattern)
+        if stats is not None:
+            count_prefilter(stats, skipped, len(active))
+        return tuple(active)
+
+    @staticmethod
+    def _value(match, group, inner_groups):
+        # Like findall: the whole match without groups, else the first non-empty group.
+        if not inner_groups:
+            return match.group(group)
+        return next((match.group(g) for g in range(group + 1, group + 1 + inner_groups) if match.group(g)), None)
+
+    def _walk(self, text: str, active: tuple, found: dict):
+        combined, slots = self._regex_for(active)
+        resume = [0] * len(slots)
+        for match in combined.finditer(text):
+            position = match.start()
+            for slot, (key, group, inner_groups) in enumerate(slots):
+                end = match.end(group)
+                if end < 0 or position < resume[slot]:
+                    continue
+                resume[slot] = end
+                found[key].append(self._value(match, group, inner_groups))
+
+    def scan(self, text: str, stats: Counter = None, on_timeout=None) -> dict:
+        """
+        Returns key -> list of matched values (whole match or first non-empty
+        group). Prefilter runs and skips are added to stats when given.
+        Guarded patterns that run out of time find nothing and are passed
+        to on_timeout.
+        """
+        found = {key: [] for key in self.keys}
+        folded = fold_text(text)
+        active = self._prefilter(self._branches, folded, stats)
+        if active:
+            self._walk(text, active, found)
+        for index in self._prefilter(self._alone, folded, stats):
+            key, pattern = self._alone[index]
+            found[key].extend(_first_value(match) for match in pattern.findall(text))
+        if self._guarded:
+            self._scan_guarded(text, folded, found, stats, on_timeout)
+        return found
+
+
+class CompiledPatterns:
+    """
+    One consistent set of harvest patterns: the raw lists as loaded, their
+    compiled forms (invalid patterns are dropped and listed in errors,
+    quarantined ones are left out and listed in quarantined) and a
+    fingerprint of the raw lists for invalidating stored results.
+
+    Patterns not in builtin (name -> the lists config.py ships) are user
+    patterns. The user harvest patterns are guarded: they only ever run in
+    the match process, under the PATTERN_TIMEOUT_SECONDS limit.
+    """
+
+    def __init__(self, lists: dict, quarantined=(), builtin: dict = None):
+        self.lists = {name: list(lists.get(name, [])) for name in PATTERN_LISTS}
+        self.builtin = frozenset(p for patterns in (builtin or {}).values() for p in patterns)
+        self.rules = dict(lists.get("STANDARDIZATION_RULES", {}))
+        self.errors = []
+        self._held = frozenset(quarantined)
+        self.quarantined = []
+        self._scanners = {}
+        self.compiled = {
+            name: self._compile(name, patterns, VALUE_FLAGS if name == "EXCLUSION_PATTERNS" else PATTERN_FLAGS)
+            for name, patterns in self.lists.items()
+        }
+        self.rule_list = []
+        for rule, replacement in self.rules.items():
+            compiled = self._compile_one("STANDARDIZATION_RULES", rule, VALUE_FLAGS)
+            if compiled is not None:
+                self.rule_list.append((compiled, replacement))
+        self._exclusion, self._separate_exclusions = _combine_exclusions(self.compiled["EXCLUSION_PATTERNS"])
+        self.guarded = frozenset(pattern for name, compiled in self.compiled.items() if name != "EXCLUSION_PATTERNS"
+                                 for pattern in compiled if pattern.pattern not in self.builtin)
+        for pattern in self.guarded:
+            if may_backtrack(pattern):
+                logger.warning(f"Pattern '{pattern.pattern}' nests repeats or alternations and may be slow on some "
+                               "documents; it is quarantined if it runs out of time.")
+        # standardize(value) applies the rules in order, memoized per pattern set.
+        self.standardize = lru_cache(maxsize=STANDARDIZE_CACHE_SIZE)(self._standardize)
+        payload = json.dumps([self.lists[name] for name in PATTERN_LISTS if name != "QA_NUMBER_PATTERNS"]
+                             + [sorted(self.rules.items())] + ([sorted(self._held)] if self._held else []))
+        self.fingerprint = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _compile_one(self, name, pattern, flags=PATTERN_FLAGS):
+        try:
+            if not isinstance(pattern, str):
+                raise TypeError(f"expected a string, got {type(pattern).__name__}")
+            return compile_pattern(pattern, flags)
+        except (re.error, TypeError) as e:
+            logger.error(f"Invalid pattern in {name}: '{pattern}' ({e}). It will be skipped.")
+            self.errors.append((name, pattern, str(e)))
+            return None
+
+    def _compile(self, name, patterns, flags=PATTERN_FLAGS):
+        self.quarantined.extend((name, p) for p in patterns if p in self._held)
+        kept = [p for p in patterns if p not in self._held]
+        return tuple(c for c in (self._compile_one(name, p, flags) for p in kept) if c is not None)
+
+    def __getitem__(self, name):
+        return self.compiled[name]
+
+    def _standardize(self, value: str) -> str:
+        for rule, replacement in self.rule_list:
+            value = rule.sub(replacement, value)
+        return value
+
+    def is_excluded(self, value: str) -> bool:
+        """True when any of the EXCLUSION_PATTERNS is found in value."""
+        if self._exclusion is not None and self._exclusion.search(value):
+            return True
+        return any(pattern.search(value) for pattern in self._separate_exclusions)
+
+    def scanner(self, fields: dict) -> MultiPatternScanner:
+        """A MultiPatternScanner over the given field -> pattern list name mapping, built once."""
+        key = tuple(fields.items())
+        scanner = self._scanners.get(key)
+        if scanner is None:
+            scanner = self._scanners[key] = MultiPatternScanner({field: self.compiled[name] for field, name in key},
+                                                                guarded=self.guarded)
+        return scanner
+
+
+class PatternRegistry:
+    """
+    Hands out the current CompiledPatterns. custom_patterns.py is executed
+    and compiled on first use and again only when its modification time or
+    size changes; if it cannot be loaded the previous patterns are kept
+    (or the ones config.py loaded at startup, on first use).
+
+    User patterns that run out of time are quarantined: recorded in the
+    quarantine file (or in memory when there is none) and left out of the
+    compiled patterns, in every process, until they are released. The
+    patterns config.py ships are never quarantined.
+    """
+
+    def __init__(self, path: Path = CUSTOM_PATTERNS_PATH, patterns: dict = None, quarantine_path: Path = QUARANTINE_PATH):
+        self.path = Path(path) if path else None
+        self.quarantine_path = Path(quarantine_path) if quarantine_path else None
+        self._fixed = patterns
+        self._held = {}
+        self._held_version = 0
+        self._stamp = None
+        self._current = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_patterns(cls, patterns: dict, quarantine_path: Path = None):
+        """A registry over fixed lists (name -> patterns), not backed by a file."""
+        return cls(path=None, patterns=patterns, quarantine_path=quarantine_path)
+
+    @staticmethod
+    def _file_stamp(path):
+        if path is None:
+            return None
+        try:
+            stat = path.stat()
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def quarantined(self) -> dict:
+        """Returns pattern -> details (document, timeout, time) for every quarantined pattern."""
+        if self.quarantine_path is None:
+            return dict(self._held)
+        try:
+            with open(self.quarantine_path, 'r', encoding='utf-8') as f:
+                return dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return {}
+
+    def _save_quarantine(self, entries: dict):
+        if self.quarantine_path is None:
+            self._held = entries
+            self._held_version += 1
+            return
+        tmp_path = self.quarantine_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.quarantine_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.quarantine_path)
+        except OSError as e:
+            logger.error(f"Could not write {self.quarantine_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def quarantine(self, pattern: str, document: str = None):
+        """Quarantines a user pattern that ran out of time; current() leaves it out from now on."""
+        if pattern in self._builtin_patterns():
+            logger.warning(f"Built-in pattern '{pattern}' took more than {PATTERN_TIMEOUT_SECONDS}s"
+                           f"{f' on {document}' if document else ''}; built-in patterns are not quarantined.")
+            return
+        with self._lock:
+            entries = self.quarantined()
+            if pattern in entries:
+                return
+            entries[pattern] = {
+                "document": document,
+                "timeout_seconds": PATTERN_TIMEOUT_SECONDS,
+                "quarantined_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._save_quarantine(entries)
+        logger.warning(f"Pattern '{pattern}' took more than {PATTERN_TIMEOUT_SECONDS}s"
+                       f"{f' on {document}' if document else ''} and was quarantined. It is skipped until it is"
+                       " changed or released in the pattern manager.")
+
+    def release(self, pattern: str):
+        """Takes a pattern out of quarantine."""
+        with self._lock:
+            entries = self.quarantined()
+            if entries.pop(pattern, None) is not None:
+                self._save_quarantine(entries)
+
+    def _builtin(self) -> dict:
+        """The lists config.py ships (name -> patterns); a fixed registry has none."""
+        if self._fixed is not None:
+            return {}
+        return getattr(config, "BUILTIN_PATTERNS", {})
+
+    def _builtin_patterns(self) -> set:
+        return {pattern for patterns in self._builtin().values() for pattern in patterns}
+
+    def _load(self):
+        if self._fixed is not None:
+            return self._fixed
+        defaults = {name: getattr(config, name, []) for name in PATTERN_LISTS + ["STANDARDIZATION_RULES"]}
+        if self._stamp[0] is None:
+            return defaults if self._current is None else None
+        try:
+            namespace = runpy.run_path(str(self.path))
+        except Exception as e:
+            logger.error(f"Could not load {self.path.name}: {e}. Keeping the previous patterns.")
+            return defaults if self._current is None else None
+        return {name: namespace.get(name, value) for name, value in defaults.items()}
+
+    def current(self) -> CompiledPatterns:
+        """Returns the compiled patterns, recompiling first if custom_patterns.py changed."""
+        stamp = (self._file_stamp(self.path), self._file_stamp(self.quarantine_path), self._held_version)
+        if self._current is not None and stamp == self._stamp:
+            return self._current
+        with self._lock:
+            if self._current is None or stamp != self._stamp:
+                previous, self._stamp = self._stamp, stamp
+                lists = self._load() if previous is None or stamp[0] != previous[0] else self._current_lists()
+                if lists is not None:
+                    self._current = CompiledPatterns(lists, self.quarantined(), self._builtin())
+                    logger.info(f"Compiled {sum(len(c) for c in self._current.compiled.values())} harvest patterns"
+                                f" ({len(self._current.errors)} invalid, {len(self._current.quarantined)} quarantined).")
+        return self._current
+
+    def _current_lists(self):
+        # Only the quarantine changed: recompile the lists already loaded.
+        if self._current is None:
+            return self._load()
+        return {**self._current.lists, "STANDARDIZATION_RULES": self._current.rules}
+
+
+# The registry used by data_harvesters.
+registry = PatternRegistry()
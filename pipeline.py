@@ -0,0 +1,141 @@
+# pipeline.py
+# Building blocks for the staged processing pipeline used by processing_engine
+import logging
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger("app.pipeline")
+
+# Default capacity of the queue between two stages.
+DEFAULT_QUEUE_SIZE = 8
+
+_END = object()
+
+
+@dataclass
+class WorkItem:
+    """One source file as it moves through discover -> extract -> harvest -> sink."""
+    index: int
+    path: Path
+    rel_path: str
+    text: str = None
+    row: dict = None
+    error: Exception = None
+    content_hash: str = None
+    page_sources: list = None
+    page_quality: list = None
+    harvested: dict = None
+    cached: bool = False
+    stats: Counter = field(default_factory=Counter)
+
+
+class _StageFailure:
+    """Carries an exception raised inside a stage thread to the consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def bounded(iterable, maxsize: int = DEFAULT_QUEUE_SIZE, name: str = "stage"):
+    """
+    Runs an upstream iterable in its own thread and yields its items through
+    a bounded queue. The producer blocks once maxsize items are waiting, which
+    gives backpressure: a slow sink throttles harvesting and extraction
+    instead of letting finished work pile up in memory.
+    """
+    buffer = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    break
+        except Exception as e:
+            logger.error(f"Pipeline stage '{name}' failed: {e}", exc_info=True)
+            put(_StageFailure(e))
+        finally:
+            close = getattr(iterable, "close", None)
+            if stop.is_set() and close:
+                close()
+            put(_END)
+
+    thread = threading.Thread(target=produce, name=f"pipeline-{name}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                break
+            if isinstance(item, _StageFailure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+def completed_future(fn, *args) -> Future:
+    """Runs fn immediately and wraps its outcome in a finished Future."""
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def ordered_map(fn, items, executor=None, window: int = 1, on_submit=None, skip=None):
+    """
+    Applies fn(item) to every item and yields (item, future) pairs in input
+    order. Without an executor fn runs inline; with one, at most `window`
+    calls are in flight so the upstream iterator is only consumed as fast as
+    results are taken. Items matching skip are passed through with a future
+    that simply holds the item.
+    """
+    def submit(item):
+        if skip and skip(item):
+            return completed_future(lambda: item)
+        if on_submit:
+            on_submit(item)
+        if executor is None:
+            return completed_future(fn, item)
+        return executor.submit(fn, item)
+
+    if executor is None:
+        for item in items:
+            yield item, submit(item)
+        return
+
+    pending = []
+    items = iter(items)
+    exhausted = False
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max(1, window):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append((item, submit(item)))
+            if not pending:
+                break
+            item, future = pending.pop(0)
+            future.exception()  # Wait for this item without raising here.
+            yield item, future
+    finally:
+        for _, future in pending:
+            future.cancel()
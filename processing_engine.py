@@ -5,30 +5,505 @@ import shutil
 from pathlib import Path
 import time
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager
+from functools import partial
 
 # Local module imports
-from ocr_utils import get_text_from_pdf
-from data_harvesters import harvest_all_data
+from ocr_utils import (
+    MIN_TEXT_QUALITY, OCR_LOW_DPI, ExtractedText, extract_text_with_sources, get_extraction_settings, get_tesseract_info,
+    iter_pdf_pages, ocr_regions, seed_tesseract_info
+)
+from cache_utils import FileManifest, get_extraction_cache, get_ocr_cache, hash_bytes, hash_file, make_cache_key
+from data_harvesters import harvest_all_data, harvest_pages, missing_fields, get_pattern_fingerprint
 from file_utils import (
     create_temp_working_dir,
     setup_output_folders,
     cleanup_directory
 )
 from excel_generator import ExcelGenerator
+from image_preprocessing import validate_steps
+from pipeline import WorkItem, bounded, ordered_map
+from run_state import JobJournal
+from config import OCR_THREADS, OCR_PREPROCESS_STEPS, REQUIRED_FIELDS, EARLY_EXIT_MAX_PAGES, ROI_TEMPLATES
 from custom_exceptions import PDFExtractionError, ExcelGenerationError
 
 logger = logging.getLogger("app.engine")
 
+def _read_pdf_bytes(src_path: Path, stats: Counter):
+    """
+    Reads a PDF into memory in one pass for zero-copy extraction.
+    Returns None when the file cannot be read in place (e.g. a share-mode
+    lock), in which case the caller falls back to the temp-copy path.
+    """
+    start = time.perf_counter()
+    try:
+        data = src_path.read_bytes()
+    except OSError as e:
+        logger.warning(f"Zero-copy read of '{src_path.name}' failed ({e}); falling back to a temp copy.")
+        stats["zero_copy_fallbacks"] += 1
+        return None
+    elapsed = time.perf_counter() - start
+    stats["zero_copy_files"] += 1
+    stats["bytes_read"] += len(data)
+    stats["read_seconds"] += elapsed
+    logger.debug(f"Read '{src_path.name}' into memory: {len(data)} bytes in {elapsed * 1000:.1f} ms (temp copy skipped).")
+    return data
+
+def _extraction_settings(options: dict) -> dict:
+    """Extractor settings plus the job options that change the extracted text."""
+    return {**get_extraction_settings(), "preprocess": list(options.get("preprocess", ())),
+            "adaptive_dpi": bool(options.get("adaptive_dpi"))}
+
+def _extraction_cache_entry(src_path: Path, options: dict, stats: Counter, content_hash: str = None):
+    """
+    Looks a PDF up in the extraction cache. Returns (cache, cache_key,
+    extracted): cache and cache_key are None when caching is off, and
+    extracted is None on a miss.
+    """
+    if not options.get("use_cache", True):
+        return None, None, None
+    cache = get_extraction_cache()
+    cache_key = make_cache_key(content_hash or hash_file(src_path), _extraction_settings(options))
+    cached = cache.get(cache_key)
+    if cached is not None:
+        stats["cache_hits"] += 1
+        return cache, cache_key, ExtractedText(cached["text"], cached.get("page_sources", []), cached.get("page_quality"))
+    stats["cache_misses"] += 1
+    return cache, cache_key, None
+
+@contextmanager
+def _pdf_source(src_path: Path, temp_dir: Path, index: int, pdf_bytes: bytes = None):
+    """
+    Yields (pdf_path, stream) for opening a PDF. With pdf_bytes the document
+    is opened from memory; otherwise it is copied to the temp directory
+    first so the original is not locked, and the copy is removed afterwards.
+    """
+    if pdf_bytes is not None:
+        yield src_path, pdf_bytes
+        return
+    # The index prefix keeps same-named files from different folders apart.
+    temp_pdf_path = temp_dir / f"{index}_{src_path.name}"
+    shutil.copy(src_path, temp_pdf_path)
+    try:
+        yield temp_pdf_path, None
+    finally:
+        temp_pdf_path.unlink(missing_ok=True)
+
+def _ocr_cache_for(options: dict):
+    """The page-level OCR cache, unless the job turned caching off."""
+    return get_ocr_cache() if options.get("use_cache", True) else None
+
+def _extract_pdf_text(item: WorkItem, temp_dir: Path, options: dict, pdf_bytes: bytes = None) -> ExtractedText:
+    """Full extraction: the text and per-page source map of every page."""
+    with _pdf_source(item.path, temp_dir, item.index, pdf_bytes) as (pdf_path, stream):
+        return extract_text_with_sources(pdf_path, stream=stream, ocr_threads=options.get("ocr_threads", 1),
+                                         ocr_cache=_ocr_cache_for(options), preprocess=options.get("preprocess", ()),
+                                         adaptive_dpi=options.get("adaptive_dpi", False))
+
+def _harvest_pdf_early(item: WorkItem, temp_dir: Path, options: dict, pdf_bytes: bytes = None):
+    """
+    Early-exit extraction: reads the PDF page by page and harvests as it
+    goes, stopping once the required fields are found or the page budget is
+    spent. Sets item.harvested and returns (extracted, complete), where
+    complete tells whether every page was read.
+    """
+    page_sources = []
+    page_quality = []
+    page_count = 0
+    with _pdf_source(item.path, temp_dir, item.index, pdf_bytes) as (pdf_path, stream):
+        # Closing the pages closes the document before the temp copy is removed.
+        with closing(iter_pdf_pages(pdf_path, stream, options.get("ocr_threads", 1), lookahead=1,
+                                    ocr_cache=_ocr_cache_for(options), preprocess=options.get("preprocess", ()),
+                                    adaptive_dpi=options.get("adaptive_dpi", False))) as pages:
+
+            def page_texts():
+                nonlocal page_count
+                for page in pages:
+                    page_sources.append(page.source)
+                    page_quality.append(page.quality)
+                    page_count = page.page_count
+                    yield page.text
+
+            item.harvested, text, pages_read = harvest_pages(
+                page_texts(), item.path.stem, options["required_fields"], options.get("max_pages", 0), stats=item.stats
+            )
+
+    if not text and "ocr" not in page_sources:
+        raise PDFExtractionError(f"No text could be extracted from '{item.path.name}'.")
+    skipped = page_count - pages_read
+    item.stats["pages_read"] += pages_read
+    item.stats["pages_skipped"] += skipped
+    if skipped:
+        item.stats["early_exit_documents"] += 1
+    return ExtractedText(text, page_sources, page_quality), not skipped
+
+def _roi_regions_for(filename: str, templates: dict) -> list:
+    """Returns the regions of the first ROI template whose filename pattern matches, or []."""
+    for template in templates.values():
+        if re.search(template["filename_pattern"], filename, re.IGNORECASE):
+            return template["regions"]
+    return []
+
+def _harvest_pdf_regions(item: WorkItem, temp_dir: Path, options: dict, pdf_bytes: bytes = None):
+    """
+    Region-of-interest OCR: for a scanned first page, OCRs only the header
+    regions of the matching ROI template. When that fills every required
+    field, sets item.harvested and returns the region text; otherwise (or
+    when the page has a text layer) returns None and the PDF is extracted
+    in full.
+    """
+    regions = _roi_regions_for(item.path.name, options["roi_templates"])
+    if not regions:
+        return None
+    with _pdf_source(item.path, temp_dir, item.index, pdf_bytes) as (pdf_path, stream):
+        roi_text = ocr_regions(pdf_path, regions, stream, preprocess=options.get("preprocess", ()))
+    if roi_text is None:
+        return None
+    item.stats["roi_documents"] += 1
+    if missing_fields(roi_text, options["required_fields"], item.stats):
+        item.stats["roi_fallbacks"] += 1
+        return None
+    item.harvested = harvest_all_data(roi_text, item.path.stem, stats=item.stats)
+    return ExtractedText(roi_text, ["ocr"])
+
+def _extract_pdf(item: WorkItem, temp_dir: Path, options: dict, pdf_bytes: bytes = None) -> ExtractedText:
+    """
+    Returns the text and per-page source map of a PDF, served from the
+    extraction cache when an identical file was already processed with the
+    same extractor settings. Otherwise the ROI and early-exit shortcuts are
+    tried when the job enables them; only text of the whole document is
+    written to the cache.
+    """
+    cache, cache_key, extracted = _extraction_cache_entry(item.path, options, item.stats, item.content_hash)
+    if extracted is not None:
+        return extracted
+    if options.get("roi_ocr"):
+        extracted = _harvest_pdf_regions(item, temp_dir, options, pdf_bytes)
+        if extracted is not None:
+            return extracted
+    complete = True
+    if options.get("early_exit"):
+        extracted, complete = _harvest_pdf_early(item, temp_dir, options, pdf_bytes)
+    else:
+        extracted = _extract_pdf_text(item, temp_dir, options, pdf_bytes)
+    if cache_key and complete:
+        cache.put(cache_key, extracted._asdict())
+    return extracted
+
+def extract_item(item: WorkItem, temp_dir: Path, options: dict) -> WorkItem:
+    """
+    Extract stage worker: fills in item.text for one source file.
+    Runs in the job thread for serial jobs and inside a pool worker for
+    parallel ones, so it must not touch the response queue or the GUI.
+    The content hash is kept when caching or a manifest needs it.
+    """
+    is_pdf = item.path.suffix.lower() == '.pdf'
+    pdf_bytes = None
+    if is_pdf and options.get("zero_copy", True):
+        pdf_bytes = _read_pdf_bytes(item.path, item.stats)
+    if options.get("use_cache", True) or options.get("incremental"):
+        item.content_hash = hash_bytes(pdf_bytes) if pdf_bytes is not None else hash_file(item.path)
+    if is_pdf:
+        ocr_cache = _ocr_cache_for(options)
+        if ocr_cache is not None:
+            # The cache is per process and a process extracts one file at a time.
+            hits, misses = ocr_cache.hits, ocr_cache.misses
+        extracted = _extract_pdf(item, temp_dir, options, pdf_bytes)
+        if ocr_cache is not None:
+            item.stats["ocr_cache_hits"] += ocr_cache.hits - hits
+            item.stats["ocr_cache_misses"] += ocr_cache.misses - misses
+        item.text, item.page_sources = extracted.text, extracted.page_sources
+        item.page_quality = extracted.page_quality
+        # Pages with a text layer that scored too low to trust (short or empty layers score 0).
+        item.stats["junk_text_pages"] += sum(1 for q in extracted.page_quality or [] if 0 < q < MIN_TEXT_QUALITY)
+        item.stats["text_pages"] += extracted.page_sources.count("text")
+        item.stats["ocr_pages"] += extracted.page_sources.count("ocr")
+        if "ocr" in extracted.page_sources:
+            item.stats["ocr_documents"] += 1
+    else: # .txt file
+        item.text = item.path.read_text(encoding='utf-8', errors='ignore')
+    return item
+
+def harvest_item(item: WorkItem):
+    """
+    Harvest stage worker: returns (data, stats) with the harvested data for
+    an extracted item, or the data already harvested during an early-exit
+    or ROI extraction. stats holds the literal prefilter counts; it is
+    returned because a pool worker's changes to the item are not sent back.
+    Items harvested during extraction already have theirs in item.stats.
+    """
+    stats = Counter()
+    if item.harvested is not None:
+        return item.harvested, stats
+    return harvest_all_data(item.text, item.path.stem, stats=stats), stats
+
+def _needs_work(item: WorkItem) -> bool:
+    return item.row is None and item.error is None
+
+def find_source_files(job_details: dict, review_files_dir: Path):
+    """Returns (source_dir, files) for the job; source_dir is None for a file list."""
+    input_path = job_details.get("input_path")
+    if job_details.get("is_rerun", False):
+        source_dir = Path(review_files_dir)
+        return source_dir, sorted(f for f in source_dir.iterdir() if f.is_file() and f.suffix.lower() == '.txt')
+    if isinstance(input_path, list):
+        return None, [Path(p) for p in input_path if Path(p).suffix.lower() in ['.pdf', '.txt']]
+    source_dir = Path(input_path)
+    return source_dir, sorted(f for f in source_dir.rglob('*') if f.is_file() and f.suffix.lower() in ['.pdf', '.txt'])
+
+def journal_path_for(report_path: Path) -> Path:
+    """Returns the checkpoint journal kept next to a report."""
+    return Path(f"{report_path}.journal.jsonl")
+
+def discover_stage(source_files, source_dir, cancel_event, pause_event, manifest=None, journal=None):
+    """
+    Discover stage: yields a WorkItem per source file in order.
+    Stops issuing new work when the job is cancelled and waits while paused.
+    Files already completed in a resumed journal, or known to be unchanged by
+    the manifest, arrive with their row set.
+    """
+    for i, src_path in enumerate(source_files):
+        while pause_event.is_set() and not cancel_event.is_set():
+            time.sleep(0.5)
+        if cancel_event.is_set():
+            return
+        rel_path = src_path.relative_to(source_dir).as_posix() if source_dir else str(src_path.resolve())
+        item = WorkItem(index=i, path=src_path, rel_path=rel_path)
+        if journal is not None:
+            item.row = journal.completed_row(rel_path)
+            if item.row is not None:
+                item.cached = True
+                item.stats["files_resumed"] += 1
+        if manifest is not None and item.row is None:
+            item.row = manifest.lookup(rel_path, src_path)
+            if item.row is not None:
+                item.cached = True
+                item.stats["files_reused"] += 1
+        yield item
+
+def extract_stage(items, temp_dir: Path, options: dict, executor=None, window: int = 1, on_start=None):
+    """Extract stage: yields items with text set, or with error set when extraction failed."""
+    worker = partial(extract_item, temp_dir=temp_dir, options=options)
+    for item, future in ordered_map(worker, items, executor, window, on_start, skip=lambda i: not _needs_work(i)):
+        try:
+            yield future.result()
+        except Exception as e:
+            item.error = e
+            yield item
+
+def harvest_stage(items, review_files_dir: Path = None, executor=None, window: int = 1):
+    """
+    Harvest stage: yields items with their report row set.
+    Files without models are flagged for review and their text is saved to
+    review_files_dir. The text is dropped afterwards so it is not carried on
+    to the sink.
+    """
+    for item, future in ordered_map(harvest_item, items, executor, window, skip=lambda i: not _needs_work(i)):
+        if not _needs_work(item):
+            yield item
+            continue
+        try:
+            harvested_data, harvest_stats = future.result()
+        except Exception as e:
+            item.error = e
+            item.text = None
+            yield item
+            continue
+        item.stats.update(harvest_stats)
+
+        filename = item.path.name
+        if not harvested_data.get("models"):
+            logger.warning(f"No models found for {filename}. Flagging for review.")
+            if review_files_dir:
+                review_txt_path = review_files_dir / f"{item.path.stem}.txt"
+                review_txt_path.write_text(item.text, encoding='utf-8')
+            harvested_data["status"] = "Needs Review"
+        else:
+            harvested_data["status"] = "Pass"
+        if item.page_quality:
+            # Text-layer quality for triage: the weakest page and every page in order.
+            harvested_data["text_quality"] = min(item.page_quality)
+            harvested_data["text_quality_pages"] = item.page_quality
+        item.row = harvested_data
+        item.text = None
+        yield item
+
+class ReportSink:
+    """
+    Sink stage: consumes finished items as they arrive. Rows are streamed to
+    the Excel report, failures are reported per file, every new outcome is
+    checkpointed in the journal, and manifest entries and job statistics are
+    collected along the way.
+    """
+
+    def __init__(self, report_path: Path, response_queue, locked_files_dir: Path = None, manifest=None, journal=None):
+        self.report_path = report_path
+        self.response_queue = response_queue
+        self.locked_files_dir = locked_files_dir
+        self.manifest = manifest
+        self.journal = journal
+        self.stats = Counter()
+        self.rows_written = 0
+        self._generator = None
+
+    def consume(self, item: WorkItem):
+        self.stats.update(item.stats)
+        if item.error is not None:
+            self.stats["failed_files"] += 1
+            self._send_counts()
+            self._report_failure(item)
+            if self.journal is not None:
+                self.journal.record(item.rel_path, error=str(item.error))
+            return
+        self.stats["review_files" if item.row.get("status") == "Needs Review" else "passed_files"] += 1
+        self._send_counts()
+        if item.stats["pages_skipped"]:
+            self.response_queue.put({"type": "log", "msg": (
+                f"Early exit: {item.path.name} read {item.stats['pages_read']} of "
+                f"{item.stats['pages_read'] + item.stats['pages_skipped']} pages.")})
+        if self._generator is None:
+            self._generator = ExcelGenerator(self.report_path)
+            self._generator.open()
+        self._generator.add_row(item.row)
+        self.rows_written += 1
+        if item.cached:
+            if item.stats["files_resumed"] and self.manifest is not None:
+                # Rows restored from the journal were never looked up in the manifest.
+                self.manifest.record(item.rel_path, item.path, item.content_hash, item.row)
+            return
+        if self.journal is not None:
+            self.journal.record(item.rel_path, row=item.row)
+        if self.manifest is not None:
+            self.manifest.record(item.rel_path, item.path, item.content_hash, item.row)
+
+    def _send_counts(self):
+        self.response_queue.put({
+            "type": "update_counts",
+            "pass": self.stats["passed_files"],
+            "fail": self.stats["failed_files"],
+            "review": self.stats["review_files"],
+            "ocr": self.stats["ocr_documents"],
+        })
+
+    def _report_failure(self, item: WorkItem):
+        filename = item.path.name
+        e = item.error
+        if isinstance(e, (OSError, shutil.Error)):
+            logger.error(f"Could not access or copy '{filename}': {e}. Skipping.")
+            self.response_queue.put({"type": "log", "msg": f"SKIPPED (locked): {filename}", "tag": "warning"})
+            if self.locked_files_dir:
+                try:
+                    shutil.copy(item.path, self.locked_files_dir / filename)
+                except Exception as final_e:
+                    logger.error(f"Failed to move locked file {filename}: {final_e}")
+        elif isinstance(e, PDFExtractionError):
+            logger.error(f"Failed to extract text from {filename}: {e}")
+            self.response_queue.put({"type": "log", "msg": f"ERROR processing {filename}: {e}", "tag": "error"})
+        else:
+            logger.error(f"An unexpected error occurred while processing {filename}: {e}", exc_info=e)
+
+    def close(self):
+        """Finishes the report. Returns its path, or None if no rows were written."""
+        if self._generator is None:
+            return None
+        self.response_queue.put({"type": "log", "msg": "Generating Excel report..."})
+        try:
+            self._generator.close()
+        except Exception as e:
+            raise ExcelGenerationError(f"Failed to generate Excel report: {e}")
+        return self.report_path
+
+    def abort(self):
+        """Discards the partially written report."""
+        if self._generator is not None:
+            self._generator.abort()
+
+def _report_job_stats(job_stats: Counter, response_queue):
+    """Logs the end-of-job counters collected from every processed file."""
+    if job_stats["ocr_pages"]:
+        msg = (f"Pages: {job_stats['text_pages']} from the text layer, {job_stats['ocr_pages']} OCR'd "
+               f"in {job_stats['ocr_documents']} documents.")
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+    if job_stats["junk_text_pages"]:
+        msg = f"Text quality: {job_stats['junk_text_pages']} pages had an unusable text layer and were sent to OCR."
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+    if job_stats["early_exit_documents"]:
+        msg = (f"Early exit: {job_stats['pages_skipped']} pages skipped in "
+               f"{job_stats['early_exit_documents']} documents.")
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+    if job_stats["roi_documents"]:
+        msg = (f"ROI OCR: {job_stats['roi_documents'] - job_stats['roi_fallbacks']} scanned PDFs harvested from "
+               f"their header regions, {job_stats['roi_fallbacks']} needed full-page OCR.")
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+    pattern_checks = job_stats["pattern_runs"] + job_stats["pattern_skips"]
+    if pattern_checks:
+        skipped = sorted(((key[1], count) for key, count in job_stats.items()
+                          if isinstance(key, tuple) and key[0] == "pattern_skipped"), key=lambda entry: -entry[1])
+        for pattern, count in skipped:
+            logger.debug(f"Literal prefilter skipped '{pattern}' in {count} documents.")
+        msg = (f"Literal prefilter: {job_stats['pattern_skips']} of {pattern_checks} pattern runs skipped "
+               f"({job_stats['pattern_skips'] / pattern_checks * 100:.0f}%).")
+        if skipped:
+            msg += " Most skipped: " + ", ".join(f"{pattern} ({count})" for pattern, count in skipped[:3]) + "."
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+    quarantined = sorted(key[1] for key in job_stats if isinstance(key, tuple) and key[0] == "pattern_quarantined")
+    if quarantined:
+        msg = (f"Quarantined {len(quarantined)} harvest pattern(s) that ran out of time: "
+               + ", ".join(f"'{pattern}'" for pattern in quarantined)
+               + ". They are skipped until fixed or released in the pattern manager.")
+        logger.warning(msg)
+        response_queue.put({"type": "log", "msg": msg, "tag": "warning"})
+    if job_stats["zero_copy_files"]:
+        megabytes = job_stats["bytes_read"] / (1024 * 1024)
+        msg = (f"Zero-copy reads: {job_stats['zero_copy_files']} PDFs, {megabytes:.1f} MB read once; "
+               f"about {job_stats['read_seconds']:.1f}s of temp copying avoided "
+               f"(estimated from read time), {job_stats['zero_copy_fallbacks']} fell back to copying.")
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+    if job_stats["files_resumed"]:
+        msg = f"Resumed job: {job_stats['files_resumed']} files taken from the checkpoint journal."
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+    if job_stats["files_reused"]:
+        msg = f"Incremental run: {job_stats['files_reused']} unchanged files reused from the previous run."
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+    lookups = job_stats["cache_hits"] + job_stats["cache_misses"]
+    if lookups:
+        hit_rate = job_stats["cache_hits"] / lookups * 100
+        msg = (f"Extraction cache: {job_stats['cache_hits']} hits, "
+               f"{job_stats['cache_misses']} misses ({hit_rate:.0f}% hit rate).")
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+    ocr_lookups = job_stats["ocr_cache_hits"] + job_stats["ocr_cache_misses"]
+    if ocr_lookups:
+        hit_rate = job_stats["ocr_cache_hits"] / ocr_lookups * 100
+        msg = (f"OCR page cache: {job_stats['ocr_cache_hits']} hits, "
+               f"{job_stats['ocr_cache_misses']} misses ({hit_rate:.0f}% hit rate).")
+        logger.info(msg)
+        response_queue.put({"type": "log", "msg": msg})
+
 def run_processing_job(job_details: dict, response_queue, cancel_event, pause_event):
     """
     The main function to orchestrate the entire file processing workflow.
-    This version is based on the stable v25.1.1 logic with v26 error handling.
+    Files flow through discover -> extract -> harvest -> sink stages joined
+    by bounded queues, so rows reach the report as soon as they are ready.
     """
     input_path = job_details.get("input_path")
     excel_path = job_details.get("excel_path")
     output_dir = Path(job_details.get("output_dir"))
     is_rerun = job_details.get("is_rerun", False)
     temp_dir = None
+    executor = None
+    journal = None
+    completed = False
     
     try:
         logger.info("--- Starting New Processing Job ---")
@@ -42,89 +517,105 @@ def run_processing_job(job_details: dict, response_queue, cancel_event, pause_ev
         locked_files_dir = output_folders.get("locked_files")
         review_files_dir = output_folders.get("needs_review")
 
-        # Determine the source directory
-        if is_rerun:
-            source_dir = Path(review_files_dir)
-            source_files = [f for f in source_dir.iterdir() if f.is_file() and f.suffix.lower() == '.txt']
-        elif isinstance(input_path, list):
-             source_files = [Path(p) for p in input_path if Path(p).suffix.lower() in ['.pdf', '.txt']]
-        else: # It's a folder path
-            source_dir = Path(input_path)
-            source_files = [f for f in source_dir.rglob('*') if f.is_file() and f.suffix.lower() in ['.pdf', '.txt']]
-
+        source_dir, source_files = find_source_files(job_details, review_files_dir)
         response_queue.put({"type": "log", "msg": f"Found {len(source_files)} files to process."})
         
         if not source_files:
             response_queue.put({"type": "log", "msg": "No valid files found.", "tag": "warning"})
             return
 
-        all_harvested_data = []
+        preprocess = validate_steps(job_details.get("preprocess", OCR_PREPROCESS_STEPS) or [])
+        if preprocess:
+            response_queue.put({"type": "log", "msg": f"Image preprocessing before OCR: {', '.join(preprocess)}."})
+        adaptive_dpi = bool(job_details.get("adaptive_dpi"))
+        if adaptive_dpi:
+            response_queue.put({"type": "log", "msg": f"Adaptive DPI: scanned pages are OCR'd at {OCR_LOW_DPI} DPI first."})
+        required_fields = job_details.get("required_fields") or REQUIRED_FIELDS
+        shortcuts = {}
+        if job_details.get("early_exit"):
+            shortcuts.update(early_exit=True, max_pages=job_details.get("max_pages", EARLY_EXIT_MAX_PAGES))
+            response_queue.put({"type": "log", "msg": f"Early exit: reading PDFs until {', '.join(required_fields)} are found."})
+        if job_details.get("roi_ocr"):
+            shortcuts.update(roi_ocr=True, roi_templates=job_details.get("roi_templates") or ROI_TEMPLATES)
+            response_queue.put({"type": "log", "msg": "ROI OCR: scanned PDFs are tried with their header regions first."})
+        if shortcuts:
+            shortcuts["required_fields"] = required_fields
+
+        # Looked up once here; pool workers are seeded with the result instead of probing again.
+        tesseract = get_tesseract_info()
+        if tesseract:
+            msg = f"Tesseract {tesseract.version} ({', '.join(tesseract.languages)}) at {tesseract.path}."
+        else:
+            msg = "Tesseract not found: scanned pages will not be OCR'd. Add it to PATH or set TESSERACT_CMD."
+        response_queue.put({"type": "log", "msg": msg})
+
+        incremental = bool(job_details.get("incremental")) and not is_rerun and not isinstance(input_path, list)
+        manifest = None
+        if incremental:
+            # Early-exit and ROI rows come from part of each document, so they are kept apart.
+            fingerprint = make_cache_key(get_pattern_fingerprint(), {**_extraction_settings({"preprocess": preprocess, "adaptive_dpi": adaptive_dpi}), **shortcuts})
+            manifest = FileManifest.for_folder(source_dir, fingerprint)
+            response_queue.put({"type": "log", "msg": "Incremental run: unchanged files will be reused from the previous run."})
+
+        max_workers = max(1, int(job_details.get("max_workers", 1)))
+        window = max_workers * 2
+        if max_workers > 1:
+            executor = ProcessPoolExecutor(max_workers=max_workers, initializer=seed_tesseract_info, initargs=(tesseract,))
+            response_queue.put({"type": "log", "msg": f"Parallel mode: using {max_workers} worker processes."})
+
+        # Split the cores between worker processes and the OCR threads inside each.
+        ocr_threads = job_details.get("ocr_threads") or min(OCR_THREADS, max(1, (os.cpu_count() or 1) // max_workers))
+        options = {
+            "ocr_threads": ocr_threads,
+            "use_cache": job_details.get("use_cache", True),
+            "incremental": incremental,
+            "zero_copy": job_details.get("zero_copy", True),
+            "preprocess": preprocess,
+            "adaptive_dpi": adaptive_dpi,
+            **shortcuts,
+        }
         total_files = len(source_files)
-        
-        for i, src_path in enumerate(source_files):
-            if cancel_event.is_set():
-                response_queue.put({"type": "log", "msg": "Processing cancelled."})
-                break
-            
-            while pause_event.is_set():
-                time.sleep(0.5)
-
-            filename = src_path.name
-            response_queue.put({"type": "status", "msg": f"Processing: {filename}"})
-            response_queue.put({"type": "progress", "value": (i / total_files) * 100})
-            
-            try:
-                text_content = ""
-                if src_path.suffix.lower() == '.pdf':
-                    # Copy to temp location to avoid locking the original
-                    temp_pdf_path = temp_dir / filename
-                    shutil.copy(src_path, temp_pdf_path)
-                    text_content = get_text_from_pdf(temp_pdf_path)
-                else: # .txt file
-                    text_content = src_path.read_text(encoding='utf-8', errors='ignore')
-
-                qa_number = src_path.stem
-                harvested_data = harvest_all_data(text_content, qa_number)
-                
-                if not harvested_data.get("models"):
-                    logger.warning(f"No models found for {filename}. Flagging for review.")
-                    if review_files_dir:
-                        review_txt_path = review_files_dir / f"{qa_number}.txt"
-                        review_txt_path.write_text(text_content, encoding='utf-8')
-                    harvested_data["status"] = "Needs Review"
-                else:
-                    harvested_data["status"] = "Pass"
-
-                all_harvested_data.append(harvested_data)
-
-            except (OSError, shutil.Error) as e:
-                logger.error(f"Could not access or copy '{filename}': {e}. Skipping.")
-                response_queue.put({"type": "log", "msg": f"SKIPPED (locked): {filename}", "tag": "warning"})
-                if locked_files_dir:
-                    try:
-                        shutil.copy(src_path, locked_files_dir / filename)
-                    except Exception as final_e:
-                        logger.error(f"Failed to move locked file {filename}: {final_e}")
-            except PDFExtractionError as e:
-                logger.error(f"Failed to extract text from {filename}: {e}")
-                response_queue.put({"type": "log", "msg": f"ERROR processing {filename}: {e}", "tag": "error"})
-            except Exception as e:
-                logger.error(f"An unexpected error occurred while processing {filename}: {e}", exc_info=True)
-
-        if not cancel_event.is_set() and all_harvested_data:
-            response_queue.put({"type": "log", "msg": "Generating Excel report..."})
-            try:
-                report_path = output_dir / f"cloned_{Path(excel_path).name}"
-                generator = ExcelGenerator(report_path)
-                generator.create_report(all_harvested_data)
-                response_queue.put({"type": "result_path", "path": str(report_path)})
-            except Exception as e:
-                raise ExcelGenerationError(f"Failed to generate Excel report: {e}")
+
+        def on_start(item):
+            response_queue.put({"type": "status", "msg": f"Processing: {item.path.name}"})
+            response_queue.put({"type": "progress", "value": (item.index / total_files) * 100})
+
+        report_path = output_dir / f"cloned_{Path(excel_path).name}"
+        resume = bool(job_details.get("resume"))
+        journal = JobJournal(journal_path_for(report_path), resume=resume)
+        if resume:
+            response_queue.put({"type": "log", "msg": f"Resuming: {len(journal.entries)} files found in the checkpoint journal."})
+
+        sink = ReportSink(report_path, response_queue, locked_files_dir, manifest, journal)
+        items = discover_stage(source_files, source_dir, cancel_event, pause_event, manifest, journal)
+        items = bounded(extract_stage(items, temp_dir, options, executor, window, on_start), name="extract")
+        items = bounded(harvest_stage(items, review_files_dir, executor, window), name="harvest")
+        for item in items:
+            sink.consume(item)
+
+        if cancel_event.is_set():
+            response_queue.put({"type": "log", "msg": "Processing cancelled."})
+        _report_job_stats(sink.stats, response_queue)
+        if manifest is not None:
+            # A cancelled run never looked up the files after the cancel point.
+            manifest.save(prune=not cancel_event.is_set())
+
+        if cancel_event.is_set():
+            sink.abort()
+        else:
+            result_path = sink.close()
+            if result_path:
+                response_queue.put({"type": "result_path", "path": str(result_path)})
+            completed = True
 
     except Exception as e:
         logger.critical(f"A critical error occurred in the processing job: {e}", exc_info=True)
         response_queue.put({"type": "log", "msg": f"CRITICAL ERROR: {e}", "tag": "error"})
     finally:
+        if journal is not None:
+            journal.close(delete=completed)
+        if executor:
+            executor.shutdown(cancel_futures=True)
         if temp_dir:
             cleanup_directory(temp_dir)
         status = "Cancelled" if cancel_event.is_set() else "Complete"
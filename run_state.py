@@ -2,6 +2,8 @@
 # Version: 26.0.0
 # Last modified: 2025-07-03
 import json
+import os
+from pathlib import Path
 from config import CACHE_DIR
 
 STATE_FILE = CACHE_DIR / 'run_state.json'
@@ -26,3 +28,60 @@ def increment_run_count() -> int:
         pass
     return count
 
+
+
+class JobJournal:
+    """
+    Append-only JSONL checkpoint of a processing job. Every finished file is
+    written as one line (flushed and synced) so a job that is closed or
+    crashes can be resumed: completed files are skipped and their rows are
+    taken from the journal. A torn last line from a crash is ignored.
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = Path(path)
+        self.entries = self._load() if resume else {}
+        self._file = None
+
+    def _load(self) -> dict:
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[record['path']] = record
+        except OSError:
+            pass
+        return entries
+
+    def completed_row(self, key: str):
+        """Returns the journaled row for a file that finished successfully."""
+        record = self.entries.get(key)
+        if record and record.get('status') == 'done':
+            return record.get('row')
+        return None
+
+    def record(self, key: str, row: dict = None, error: str = None):
+        """Appends the outcome of one file to the journal."""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            mode = 'a' if self.entries else 'w'
+            self._file = open(self.path, mode, encoding='utf-8')
+        record = {'path': key, 'status': 'failed' if error else 'done', 'row': row, 'error': error}
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self, delete: bool = False):
+        """Closes the journal, removing it once the job has completed."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if delete:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,59 @@
+import os
+
+from cache_utils import DiskCache, hash_file, make_cache_key
+
+
+def test_disk_cache_round_trip_counts_hits_and_misses(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=10_000)
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, {"text": "hello"})
+    assert cache.get("ab" * 32) == {"text": "hello"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=300)
+    keys = [f"{i:02d}" * 32 for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, {"text": "x" * 80})
+        path = tmp_path / key[:2] / f"{key}.json"
+        os.utime(path, (age, age))
+    cache.get(keys[0])  # Refreshes the oldest entry.
+    cache.put("99" * 32, {"text": "x" * 80})
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+
+
+def test_disk_cache_evicts_to_a_low_water_mark_and_scans_rarely(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path, max_bytes=1_000)
+    scans = []
+    iter_entries = cache._iter_entries
+    monkeypatch.setattr(cache, "_iter_entries", lambda: scans.append(1) or iter_entries())
+    for i in range(40):
+        cache.put(f"{i:02d}" * 32, {"text": "x" * 80})
+    size = sum(path.stat().st_size for path in tmp_path.glob("*/*.json"))
+    assert size <= 1_000
+    assert size == cache._size_estimate
+    # One scan for the first write, then one per eviction: each frees room for a batch of writes.
+    assert len(scans) <= 1 + 40 // 2
+    cache.put("39" * 32, {"text": "x" * 80})  # Overwriting an entry does not grow the total.
+    assert cache._size_estimate == size
+
+
+def test_cache_key_depends_on_content_and_settings(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF-1.4 data")
+    digest = hash_file(pdf)
+    assert make_cache_key(digest, {"dpi": 300}) == make_cache_key(digest, {"dpi": 300})
+    assert make_cache_key(digest, {"dpi": 300}) != make_cache_key(digest, {"dpi": 150})
+
+
+def test_disk_cache_handles_concurrent_writers(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = DiskCache(tmp_path, max_bytes=1_000_000)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda i: cache.put("ab" * 32, {"text": str(i)}), range(40)))
+        list(pool.map(lambda i: cache.get("ab" * 32), range(40)))
+    assert cache.hits == 40
+    assert not list(tmp_path.glob("*/*.tmp"))
@@ -16,8 +16,7 @@ if 'PIL.Image' not in sys.modules:
     sys.modules.setdefault('PIL.Image', pil_image_stub)
 
 processing_stub = types.ModuleType("processing_engine")
-processing_stub.process_folder = lambda *a, **k: None
-processing_stub.process_zip_archive = lambda *a, **k: None
+processing_stub.run_processing_job = lambda *a, **k: None
 sys.modules.setdefault("processing_engine", processing_stub)
 
 # Stub Pillow's Image module
@@ -40,36 +39,28 @@ except Exception:  # pragma: no cover - skip if dependencies missing
 
 
 def test_main_runs(monkeypatch, tmp_path):
-    folder_called = {}
-    zip_called = {}
+    jobs = []
 
-    def fake_process_folder(folder, excel, *a):
-        folder_called['path'] = folder
-        folder_called['excel'] = excel
+    def fake_run(job, response_queue, cancel_event, pause_event):
+        jobs.append(dict(job, files=sorted(p.name for p in Path(job["input_path"]).iterdir())))
 
-    def fake_process_zip(zip_path, excel, *a):
-        zip_called['path'] = zip_path
-        zip_called['excel'] = excel
-
-    monkeypatch.setattr(cli_runner, 'process_folder', fake_process_folder)
-    monkeypatch.setattr(cli_runner, 'process_zip_archive', fake_process_zip)
+    monkeypatch.setattr(cli_runner, 'run_processing_job', fake_run)
 
     excel = tmp_path / "base.xlsx"
     excel.write_text("dummy")
 
     monkeypatch.setattr(sys, 'argv', ['cli_runner.py', '--folder', str(tmp_path), '--excel', str(excel)])
     cli_runner.main()
-    assert folder_called
+    assert jobs[-1]["input_path"] == str(tmp_path)
+    assert jobs[-1]["resume"] is False
 
     zip_file = tmp_path / 'docs.zip'
     import zipfile
-    with zipfile.ZipFile(zip_file, 'w'):
-        pass
-    new_excel = tmp_path / "base2.xlsx"
-    new_excel.write_text("dummy")
+    with zipfile.ZipFile(zip_file, 'w') as zf:
+        zf.writestr("a.pdf", "x")
 
-    folder_called.clear()
-    monkeypatch.setattr(sys, 'argv', ['cli_runner.py', '--zip', str(zip_file), '--excel', str(new_excel)])
+    monkeypatch.setattr(sys, 'argv', ['cli_runner.py', '--zip', str(zip_file), '--excel', str(excel), '--resume', '--workers', '2'])
     cli_runner.main()
-    assert zip_called
-
+    assert jobs[-1]["files"] == ["a.pdf"]
+    assert jobs[-1]["resume"] is True
+    assert jobs[-1]["max_workers"] == 2
@@ -0,0 +1,52 @@
+import json
+import sys
+import types
+
+# ruff: noqa: E402
+
+sys.modules.setdefault("pandas", types.ModuleType("pandas"))
+
+import debug_harvester
+import pattern_registry
+from pattern_registry import PatternRegistry
+
+
+def test_profile_reports_cost_matches_and_sole_contributors(monkeypatch, tmp_path):
+    monkeypatch.setattr(pattern_registry, "registry", PatternRegistry.from_patterns({
+        "MODEL_PATTERNS": [r"\bKM-\d+\b", r"\bKM-2540\b", r"\bTASKalfa\s*\d+"],
+        "REVISION_PATTERNS": [r"Rev\.\s*(\d+)"],
+    }))
+    (tmp_path / "QA_1.txt").write_text("KM-2540 Rev. 2", encoding="utf-8")
+    (tmp_path / "QA_2.txt").write_text("KM-3050 and KM-3060", encoding="utf-8")
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / "ab12.json").write_text(json.dumps({"text": "TASKalfa 3554", "page_sources": []}), encoding="utf-8")
+    (tmp_path / "cache" / "other.json").write_text(json.dumps({"files": {}}), encoding="utf-8")
+
+    documents = list(debug_harvester.iter_cached_texts(tmp_path))
+    assert [name for name, _ in documents] == ["QA_1", "QA_2", "ab12"]
+
+    count, rows = debug_harvester.profile_patterns(documents)
+    assert count == 3
+    assert [row["seconds"] for row in rows] == sorted((row["seconds"] for row in rows), reverse=True)
+    by_pattern = {row["pattern"]: row for row in rows}
+    assert by_pattern[r"\bKM-\d+\b"]["matches"] == 3
+    assert by_pattern[r"\bKM-\d+\b"]["unique_values"] == 3
+    # QA_1's model comes from two patterns, so only QA_2 counts as sole for the general one.
+    assert by_pattern[r"\bKM-\d+\b"]["sole_documents"] == 1
+    assert by_pattern[r"\bKM-2540\b"]["sole_documents"] == 0
+    assert by_pattern[r"\bTASKalfa\s*\d+"]["runs"] == 1
+    assert by_pattern[r"Rev\.\s*(\d+)"]["sole_share"] == 1 / 3
+
+
+def test_profile_counts_timeouts_apart_from_timed_runs(monkeypatch):
+    monkeypatch.setattr(pattern_registry, "registry", PatternRegistry.from_patterns({
+        "MODEL_PATTERNS": [r"(a+)+$", r"\bKM-\d+\b"],
+    }))
+    documents = [("slow", "a" * 40 + "! KM-2540")]
+
+    _, rows = debug_harvester.profile_patterns(documents, timeout=0.2)
+    by_pattern = {row["pattern"]: row for row in rows}
+    assert by_pattern[r"(a+)+$"]["timeouts"] == 1
+    assert by_pattern[r"(a+)+$"]["seconds"] == 0.0
+    assert by_pattern[r"\bKM-\d+\b"]["timeouts"] == 0
+    assert by_pattern[r"\bKM-\d+\b"]["matches"] == 1
@@ -0,0 +1,36 @@
+import sys
+import types
+
+import pytest
+
+sys.modules.setdefault("pandas", types.ModuleType("pandas"))
+
+import excel_generator  # noqa: E402
+
+
+def test_streamed_report_writes_spooled_rows(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    if not hasattr(openpyxl, "Workbook"):
+        pytest.skip("openpyxl is stubbed")
+
+    report = tmp_path / "report.xlsx"
+    generator = excel_generator.ExcelGenerator(report)
+    generator.open()
+    generator.add_row({"qa_number": "QA1", "models": ["KM-1", "KM-2"]})
+    assert generator.spool_path.exists()
+    generator.add_row({"qa_number": "QA2", "models": [], "status": "Needs Review"})
+    generator.close()
+
+    assert not generator.spool_path.exists()
+    rows = [[c.value for c in row] for row in openpyxl.load_workbook(report).active]
+    assert rows[0] == ["qa_number", "models", "status"]
+    assert rows[1] == ["QA1", "['KM-1', 'KM-2']", None]
+
+
+def test_aborted_report_removes_spool(tmp_path):
+    generator = excel_generator.ExcelGenerator(tmp_path / "report.xlsx")
+    generator.open()
+    generator.add_row({"qa_number": "QA1"})
+    generator.abort()
+    assert not generator.spool_path.exists()
+    assert not (tmp_path / "report.xlsx").exists()
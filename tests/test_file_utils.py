@@ -1,6 +1,8 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from file_utils import is_file_locked, ensure_folders
@@ -53,3 +55,35 @@ def test_ensure_folders_renames_pdf_txt(tmp_path: Path, monkeypatch):
     assert (tmp_path / 'NEED_REVIEW').exists()
 
 
+
+
+def test_find_tesseract_prefers_env_then_path(tmp_path: Path, monkeypatch):
+    import file_utils
+
+    exe = tmp_path / "tesseract"
+    exe.write_text("")
+    monkeypatch.chdir(tmp_path / "..")
+    monkeypatch.setenv("TESSERACT_CMD", str(exe))
+    assert file_utils.find_tesseract_executable() == str(exe)
+
+    monkeypatch.delenv("TESSERACT_CMD")
+    monkeypatch.setattr(file_utils.shutil, "which", lambda name: "/opt/bin/tesseract")
+    assert file_utils.find_tesseract_executable() == "/opt/bin/tesseract"
+
+    monkeypatch.setattr(file_utils.shutil, "which", lambda name: None)
+    with pytest.raises(FileNotFoundError):
+        file_utils.find_tesseract_executable()
+
+
+def test_shared_helpers_work_without_tkinter(tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "tkinter", None)
+    monkeypatch.delitem(sys.modules, "file_utils", raising=False)
+    import file_utils
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(file_utils.tempfile, "mkdtemp", fail)
+    assert file_utils.create_temp_working_dir() is None
+    monkeypatch.setattr(file_utils.shutil, "rmtree", fail)
+    file_utils.cleanup_directory(tmp_path)
@@ -0,0 +1,40 @@
+import random
+import sys
+import types
+
+import pytest
+
+# ruff: noqa: E402
+
+sys.modules.setdefault("pandas", types.ModuleType("pandas"))
+
+import data_harvesters
+import pattern_registry
+from pattern_registry import PatternRegistry
+from tests.test_harvest_scanner import PATTERNS, TOKENS
+
+
+@pytest.fixture
+def pandas(monkeypatch):
+    """The real pandas (and NumPy) instead of the test stubs, with the test patterns."""
+    for name, attribute in (("numpy", "ndarray"), ("pandas", "DataFrame")):
+        if not hasattr(sys.modules.get(name), attribute):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+    real = pytest.importorskip("pandas")
+    monkeypatch.setattr(data_harvesters, "pd", real)
+    monkeypatch.setattr(pattern_registry, "registry", PatternRegistry.from_patterns(PATTERNS))
+    return real
+
+
+def test_batch_rows_match_harvest_all_data(pandas):
+    rng = random.Random(11)
+    texts = [" ".join(rng.choice(TOKENS) for _ in range(rng.randint(0, 40))) for _ in range(200)] + [""]
+    documents = [(f"QA_{n}", text) for n, text in enumerate(texts)]
+    frame = data_harvesters.harvest_batch(iter(documents))
+    assert list(frame.columns) == ["qa_number", *data_harvesters.FIELD_PATTERNS]
+    assert frame.to_dict("records") == [data_harvesters.harvest_all_data(text, qa) for qa, text in documents]
+
+
+def test_empty_batch_has_the_report_columns(pandas):
+    frame = data_harvesters.harvest_batch([])
+    assert frame.empty and list(frame.columns) == ["qa_number", *data_harvesters.FIELD_PATTERNS]
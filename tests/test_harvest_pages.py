@@ -0,0 +1,55 @@
+import sys
+import types
+from collections import Counter
+
+import pytest
+
+# ruff: noqa: E402
+
+sys.modules.setdefault("pandas", types.ModuleType("pandas"))
+
+import data_harvesters
+import pattern_registry
+
+
+@pytest.fixture
+def patterns(monkeypatch):
+    monkeypatch.setattr(pattern_registry, "registry", pattern_registry.PatternRegistry.from_patterns(
+        {"MODEL_PATTERNS": [r"KM-\d+"], "REVISION_PATTERNS": [r"Rev\.\s*(\d+)"]}
+    ))
+    monkeypatch.setattr(data_harvesters, "harvest_all_data", lambda text, qa, stats=None: {"qa_number": qa, "text": text})
+
+
+def _pages(texts, pulled):
+    for text in texts:
+        pulled.append(text)
+        yield text
+
+
+def test_harvest_pages_stops_when_required_fields_are_found(patterns):
+    pulled = []
+    data, text, pages_read = data_harvesters.harvest_pages(
+        _pages(["KM-1 cover", "Rev. 2", "body"], pulled), "QA_1", ["models", "revision"]
+    )
+    assert pulled == ["KM-1 cover", "Rev. 2"]
+    assert pages_read == 2
+    assert data == {"qa_number": "QA_1", "text": "KM-1 cover\nRev. 2"}
+
+
+def test_harvest_pages_counts_the_pattern_checks_of_every_page(patterns):
+    stats = Counter()
+    data_harvesters.harvest_pages(iter(["KM-1 cover", "Rev. 2", "body"]), "QA_1", ["models", "revision"], stats=stats)
+    # The revision pattern needs "rev." and is skipped on the cover page.
+    assert (stats["pattern_runs"], stats["pattern_skips"]) == (2, 1)
+
+
+def test_harvest_pages_respects_page_budget(patterns):
+    pulled = []
+    _, _, pages_read = data_harvesters.harvest_pages(_pages(["a", "b", "c", "KM-1"], pulled), "QA_1", ["models"], max_pages=2)
+    assert pages_read == 2
+    assert pulled == ["a", "b"]
+
+
+def test_harvest_pages_rejects_unknown_fields(patterns):
+    with pytest.raises(ValueError):
+        data_harvesters.harvest_pages(iter(["a"]), "QA_1", ["author"])
@@ -0,0 +1,132 @@
+import random
+import re
+import sys
+import types
+
+import pytest
+
+# ruff: noqa: E402
+
+sys.modules.setdefault("pandas", types.ModuleType("pandas"))
+
+import data_harvesters
+import pattern_registry
+from pattern_registry import PatternRegistry
+
+PATTERNS = {
+    "MODEL_PATTERNS": [
+        r"\bFS\-\d+DN\b", r"\bM\d+dn\b", r"\bM\d+idn\b", r"\bM\d+idnf\b", r"\bKM\-\d+\b", r"\bKM\-C\d+/C\d+\b",
+        r"\bTASKalfa\s*\d+\w*", r"\bECOSYS\s*([A-Z]\d+)(\w*)", r"\bFax\b", r"\bFax\b", r"(\w)\1KM",
+    ],
+    "PART_NUMBER_PATTERNS": [r"\b\d[A-Z]{2}\d{5}\b", r"\b30\d[A-Z]{2}\d{5}\b", r"(?<=P/N )\w+", r"x*"],
+    "SERIAL_NUMBER_PATTERNS": [r"Serial(?: No\.?)?:?\s*(?P<serial>[A-Z0-9]{8,})"],
+    "DOCUMENT_TYPE_PATTERNS": [r"\b(Service|Technical) Bulletin\b"],
+    "DOCUMENT_TITLE_PATTERNS": [r"^Subject:\s*(.+)$"],
+    "REVISION_PATTERNS": [r"\bRev(?:ision)?\.?\s*(\d+)", r"(?i)\bver\.\s*(\d+)"],
+    "LANGUAGE_PATTERNS": [r"\b(English|Japanese|German)\b"],
+    "EXCLUSION_PATTERNS": [r"^KM-0$"],
+    "STANDARDIZATION_RULES": {r"^km-": "KM-", r"\s+": " "},
+}
+
+TOKENS = [
+    "the", "paper", "jam", "fuser", "KM-2540", "km-0", "KM-C2520/C3225", "FS-1020DN", "M2040dn", "M3655idn",
+    "M3655idnf", "TASKalfa 3554ci", "TASKalfa4054ci", "ECOSYS M2540dn", "ECOSYS P3045", "Fax", "302NL93050",
+    "2LV06080", "P/N 303LV94060", "Serial No.: W3R1234567", "Service Bulletin", "Technical Bulletin",
+    "\nSubject: Fuser replacement\n", "Rev. 2", "Revision 10", "ver. 3", "English", "German", "aaKM", "xx", "-",
+]
+NON_ASCII = ["SERİAL No.: W3R1234567", "İSTANBUL", "ıdn", "M3655İDN", "Straße", "KM-2540İ", "ＤＰ", "DP İ", "ECOSYS Ｍ2540"]
+
+
+def _reference(text, patterns):
+    """harvest_all_data as it was: re.findall pattern by pattern, then the rule loop and exclusion searches."""
+    rules = patterns.get("STANDARDIZATION_RULES", {})
+    exclusions = patterns.get("EXCLUSION_PATTERNS", [])
+    data = {"qa_number": "QA_1"}
+    for field, list_name in data_harvesters.FIELD_PATTERNS.items():
+        results = []
+        for pattern in patterns.get(list_name, []):
+            for match in re.findall(pattern, text, re.IGNORECASE | re.MULTILINE):
+                if isinstance(match, tuple):
+                    match = next((item for item in match if item), None)
+                if match and match.strip():
+                    value = match.strip()
+                    for rule, replacement in rules.items():
+                        value = re.sub(rule, replacement, value, flags=re.IGNORECASE)
+                    results.append(value)
+        found = [value for value in sorted(set(results)) if not any(re.search(ex, value, re.IGNORECASE) for ex in exclusions)]
+        data[field] = (found[0] if found else None) if field in data_harvesters.SINGLE_VALUE_FIELDS else found
+    return data
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(pattern_registry, "registry", PatternRegistry.from_patterns(PATTERNS))
+
+
+def test_single_pass_scan_matches_pattern_by_pattern_harvest(registry):
+    rng = random.Random(7)
+    corpus = [" ".join(rng.choice(TOKENS + NON_ASCII) for _ in range(rng.randint(0, 60))) for _ in range(400)]
+    corpus += ["", "KM-2540KM-3040 M3655idnf M3655idn", "Rev.2Rev.3 Subject:\nSubject: x"] + NON_ASCII
+    for text in corpus:
+        assert data_harvesters.harvest_all_data(text, "QA_1") == _reference(text, PATTERNS), text
+
+
+def test_single_pass_scan_matches_the_original_harvest_with_the_shipped_patterns(monkeypatch):
+    shipped = {name: getattr(pattern_registry.config, name) for name in pattern_registry.PATTERN_LISTS}
+    shipped["STANDARDIZATION_RULES"] = pattern_registry.config.STANDARDIZATION_RULES
+    monkeypatch.setattr(pattern_registry, "registry", PatternRegistry.from_patterns(shipped))
+    rng = random.Random(11)
+    tokens = TOKENS + NON_ASCII + ["DP", "M3655idn", "KM-C2520", "Vi2"]
+    corpus = [" ".join(rng.choice(tokens) for _ in range(rng.randint(0, 60))) for _ in range(400)]
+    corpus += NON_ASCII
+    for text in corpus:
+        assert data_harvesters.harvest_all_data(text, "QA_1") == _reference(text, shipped), text
+
+
+def test_scanner_runs_unembeddable_patterns_on_their_own(registry):
+    scanner = pattern_registry.registry.current().scanner(data_harvesters.FIELD_PATTERNS)
+    # Every pattern of a fixed registry is a user pattern, scanned in the match process.
+    alone = {pattern.pattern for _, pattern in scanner._guarded_scanner._alone}
+    assert alone == {r"(\w)\1KM", r"x*", r"Serial(?: No\.?)?:?\s*(?P<serial>[A-Z0-9]{8,})", r"(?i)\bver\.\s*(\d+)"}
+
+
+@pytest.mark.parametrize("pattern, literals", [
+    (r"\bKM\-\d+\b", {"km-"}),
+    (r"\b(Service|Technical) Bulletin\b", {" bulletin"}),
+    (r"\b(English|Japanese|German)\b", {"english", "japanese", "german"}),
+    (r"\bRev(?:ision)?\.?\s*(\d+)", {"rev"}),
+    (r"\bDP\b", None),
+    (r"(?:abc)?\d+", None),
+])
+def test_required_literals(pattern, literals):
+    required = pattern_registry.required_literals(pattern_registry.compile_pattern(pattern))
+    assert (set(required) if required else None) == literals
+
+
+def test_prefilter_counts_skipped_patterns_without_changing_results(registry):
+    stats = pattern_registry.Counter()
+    text = "Service Bulletin for KM-2540, Rev. 2"
+    assert data_harvesters.harvest_all_data(text, "QA_1", stats) == _reference(text, PATTERNS)
+    assert stats[("pattern_skipped", r"\bTASKalfa\s*\d+\w*")] == 1
+    assert stats[("pattern_skipped", r"\bKM\-\d+\b")] == 0
+    assert stats["pattern_skips"] > 0 and stats["pattern_runs"] > 0
+
+
+def test_fold_text_matches_ignorecase_literals():
+    assert "fix" in pattern_registry.fold_text("FİX")
+    assert pattern_registry.may_match(pattern_registry.compile_pattern("fix"), pattern_registry.fold_text("fıx"))
+
+
+def test_time_limited_matching_matches_like_re():
+    rng = random.Random(3)
+    tokens = TOKENS + ["SERİAL No.: W3R1234567", "İSTANBUL", "ıstanbul", "straße", "KM-2540İ", "Ｍ3655idn"]
+    corpus = [" ".join(rng.choice(tokens) for _ in range(rng.randint(0, 60))) for _ in range(200)]
+    corpus += ["SERİAL", "Serial No.: İ12345678"]
+    patterns = [pattern_registry.compile_pattern(p) for name, values in PATTERNS.items() if name.endswith("PATTERNS")
+                for p in values]
+    patterns += [pattern_registry.compile_pattern(r"[A-Z]{3,}"), pattern_registry.compile_pattern(r"\bİ\w+")]
+    for pattern in patterns:
+        for text in corpus:
+            assert pattern_registry.guarded_findall(pattern, text) == pattern.findall(text), (pattern.pattern, text)
+            assert pattern_registry.guarded_spans(pattern, text) == [m.span() for m in pattern.finditer(text)], \
+                (pattern.pattern, text)
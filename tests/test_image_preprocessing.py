@@ -0,0 +1,65 @@
+import importlib
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def ip(monkeypatch):
+    """image_preprocessing loaded against the real NumPy instead of the test stub."""
+    if not hasattr(sys.modules.get("numpy"), "ndarray"):
+        monkeypatch.delitem(sys.modules, "numpy", raising=False)
+        pytest.importorskip("numpy")
+    monkeypatch.delitem(sys.modules, "image_preprocessing", raising=False)
+    module = importlib.import_module("image_preprocessing")
+    yield module
+    sys.modules.pop("image_preprocessing", None)
+
+
+def _text_lines(np, height=400, width=300):
+    page = np.full((height, width), 255, dtype=np.uint8)
+    for y in range(40, height - 40, 20):
+        page[y:y + 4, 30:width - 30] = 0
+    return page
+
+
+def test_binarize_handles_uneven_lighting(ip):
+    import numpy as np
+
+    page = _text_lines(np)
+    shaded = (page.astype(np.int32) - np.linspace(0, 120, page.shape[1], dtype=np.int32)).clip(0, 255).astype(np.uint8)
+    binary = ip.adaptive_binarize(shaded)
+    assert set(np.unique(binary)) <= {0, 255}
+    assert (binary[40:44, 30:270] == 0).all()
+    assert (binary[50:55, 30:270] == 255).all()
+
+
+def test_estimate_skew_finds_sheared_lines(ip):
+    import numpy as np
+
+    page = np.full((400, 400), 255, dtype=np.uint8)
+    xs = np.arange(30, 370)
+    for y in range(60, 340, 25):
+        rows = (y + np.tan(np.deg2rad(2.0)) * xs).astype(int)
+        page[rows, xs] = 0
+    assert abs(abs(ip.estimate_skew(page)) - 2.0) <= 0.25
+    assert ip.estimate_skew(_text_lines(np)) == 0.0
+
+
+def test_crop_borders_removes_dark_edges(ip):
+    import numpy as np
+
+    page = np.pad(_text_lines(np), 15, constant_values=0)
+    assert ip.crop_borders(page).shape == (400, 300)
+
+
+def test_preprocess_runs_steps_in_order_and_times_them(ip):
+    import numpy as np
+
+    timings = {}
+    rgb = np.stack([_text_lines(np)] * 3, axis=2)
+    result = ip.preprocess(rgb, ["grayscale", "binarize"], timings)
+    assert result.ndim == 2
+    assert set(timings) == {"grayscale", "binarize"}
+    with pytest.raises(ValueError):
+        ip.validate_steps(["grayscale", "sharpen"])
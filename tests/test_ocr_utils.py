@@ -1,6 +1,9 @@
 import sys
 import types
 import logging
+from pathlib import Path
+
+import pytest
 
 # Ensure cv2 stub exists if OpenCV is not installed
 if 'cv2' not in sys.modules:
@@ -107,3 +110,58 @@ def test_extract_text_from_pdf_ocr_failure(monkeypatch, caplog):
     assert any(
         "OCR extraction failed" in record.message for record in caplog.records
     )
+
+
+def test_tesseract_is_looked_up_lazily_and_once(monkeypatch):
+    calls = []
+
+    def fake_find():
+        calls.append(1)
+        return "/usr/bin/tesseract"
+
+    monkeypatch.setattr(ocr_utils, "_tesseract", None)
+    # Patching TESSERACT_AVAILABLE elsewhere leaves a plain module attribute behind.
+    monkeypatch.delitem(vars(ocr_utils), "TESSERACT_AVAILABLE", raising=False)
+    monkeypatch.setattr(ocr_utils, "find_tesseract_executable", fake_find)
+    monkeypatch.setattr(ocr_utils.pytesseract, "pytesseract", types.SimpleNamespace(tesseract_cmd=None), raising=False)
+    monkeypatch.setattr(ocr_utils.pytesseract, "get_tesseract_version", lambda: "5.3.0", raising=False)
+    monkeypatch.setattr(ocr_utils.pytesseract, "get_languages", lambda config="": ["osd", "eng"], raising=False)
+
+    assert ocr_utils.TESSERACT_AVAILABLE
+    info = ocr_utils.get_tesseract_info()
+    assert info == ocr_utils.TesseractInfo("/usr/bin/tesseract", "5.3.0", ("eng", "osd"))
+    assert ocr_utils.TESSERACT_PATH == "/usr/bin/tesseract"
+    assert calls == [1]
+
+
+def test_seeded_tesseract_info_skips_the_lookup(monkeypatch):
+    monkeypatch.setattr(ocr_utils, "_tesseract", None)
+    monkeypatch.setattr(ocr_utils, "find_tesseract_executable", lambda: pytest.fail("looked up again"))
+    ocr_utils.seed_tesseract_info(None)
+    assert not ocr_utils.tesseract_available()
+    assert ocr_utils.get_extraction_settings()["ocr_available"] is False
+
+
+class ClosingDoc(DummyDoc):
+    def __init__(self, pages):
+        self.pages = [types.SimpleNamespace(get_text=lambda text=f"page {n} " * 20: text) for n in range(pages)]
+        self.closed = False
+
+    def load_page(self, number):
+        return self.pages[number]
+
+    def close(self):
+        self.closed = True
+
+
+def test_iter_pdf_pages_closes_the_document(monkeypatch):
+    monkeypatch.setattr(ocr_utils, "tesseract_available", lambda: False)
+    docs = []
+    monkeypatch.setattr(ocr_utils, "_open_pdf", lambda path, stream=None: docs.append(ClosingDoc(3)) or docs[-1])
+
+    pages = ocr_utils.iter_pdf_pages(Path("a.pdf"), lookahead=1)
+    assert next(pages).number == 0
+    pages.close()
+    assert docs[-1].closed
+    assert len(list(ocr_utils.iter_pdf_pages(Path("a.pdf")))) == 3
+    assert docs[-1].closed
@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import types
+from collections import Counter
+
+import pytest
+
+# ruff: noqa: E402
+
+sys.modules.setdefault("pandas", types.ModuleType("pandas"))
+
+import data_harvesters
+import pattern_registry
+from pattern_registry import CompiledPatterns, PatternRegistry
+
+
+def _write(path, models, mtime):
+    path.write_text(f"MODEL_PATTERNS = {models!r}\nEXCLUSION_PATTERNS = [r'KM-0']\n", encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_registry_compiles_once_and_reloads_on_change(tmp_path):
+    source = tmp_path / "custom_patterns.py"
+    _write(source, [r"\bKM-\d+\b"], 1_000_000_000)
+    registry = PatternRegistry(source)
+
+    first = registry.current()
+    assert registry.current() is first
+    assert [p.pattern for p in first["MODEL_PATTERNS"]] == [r"\bKM-\d+\b"]
+
+    _write(source, [r"\bFS-\d+DN\b", r"\bTASKalfa"], 2_000_000_000)
+    second = registry.current()
+    assert second is not first
+    assert [p.pattern for p in second["MODEL_PATTERNS"]] == [r"\bFS-\d+DN\b", r"\bTASKalfa"]
+    assert second.fingerprint != first.fingerprint
+
+
+def test_invalid_patterns_are_reported_and_skipped(tmp_path):
+    source = tmp_path / "custom_patterns.py"
+    _write(source, [r"KM-(\d+", r"\bKM-\d+\b"], 1_000_000_000)
+    registry = PatternRegistry(source)
+    patterns = registry.current()
+    assert [p.pattern for p in patterns["MODEL_PATTERNS"]] == [r"\bKM-\d+\b"]
+    assert patterns.errors[0][:2] == ("MODEL_PATTERNS", r"KM-(\d+")
+
+    source.write_text("MODEL_PATTERNS = [", encoding="utf-8")
+    os.utime(source, ns=(2_000_000_000, 2_000_000_000))
+    assert registry.current() is patterns
+
+
+def test_harvest_all_data_uses_the_registry(monkeypatch):
+    monkeypatch.setattr(pattern_registry, "registry", PatternRegistry.from_patterns({
+        "MODEL_PATTERNS": [r"\bKM-\d+\b"],
+        "REVISION_PATTERNS": [r"Rev\.\s*(\d+)"],
+        "EXCLUSION_PATTERNS": [r"^KM-0$"],
+        "STANDARDIZATION_RULES": {r"^km-": "KM-"},
+    }))
+    data = data_harvesters.harvest_all_data("km-2540 and KM-0, Rev. 3", "QA_1")
+    assert data["models"] == ["KM-2540"]
+    assert data["revision"] == "3"
+    assert data["part_numbers"] == []
+
+
+def test_exclusions_are_matched_as_one_regex():
+    exclusions = [r"^KM-0$", r"(\w)\1{3}", r"(?P<x>TEST)", r"sample", r"(?i)^draft"]
+    patterns = CompiledPatterns({"EXCLUSION_PATTERNS": exclusions})
+    assert {p.pattern for p in patterns._separate_exclusions} == {r"(\w)\1{3}", r"(?P<x>TEST)", r"(?i)^draft"}
+    for value in ["KM-0", "KM-01", "AAAA", "ABAB", "test", "Sample 1", "draft 2", "Re: draft", ""]:
+        expected = any(pattern.search(value) for pattern in patterns["EXCLUSION_PATTERNS"])
+        assert patterns.is_excluded(value) == expected, value
+
+
+def test_standardization_is_an_ordered_memoized_chain():
+    patterns = CompiledPatterns({"STANDARDIZATION_RULES": {r"^km-": "KM-", r"KM-(\d)": r"KM \1", r"\s+": " "}})
+    assert patterns.standardize("km-2540") == "KM 2540"
+    assert data_harvesters.standardize_data("km-2540", patterns) == "KM 2540"
+    assert patterns.standardize.cache_info().hits == 1
+
+
+EVIL = r"(a|aa)+$"
+
+
+def test_patterns_that_run_out_of_time_are_quarantined(monkeypatch):
+    monkeypatch.setattr(pattern_registry, "PATTERN_TIMEOUT_SECONDS", 0.05)
+    registry = PatternRegistry.from_patterns({"MODEL_PATTERNS": [r"\bKM-\d+\b", EVIL]})
+    monkeypatch.setattr(pattern_registry, "registry", registry)
+    stats = Counter()
+
+    data = data_harvesters.harvest_all_data("KM-2540\n" + "a" * 40 + "!", "QA_1", stats)
+    assert data["models"] == ["KM-2540"]
+    assert stats[("pattern_quarantined", EVIL)] == 1
+    assert registry.quarantined()[EVIL]["document"] == "QA_1"
+    patterns = registry.current()
+    assert [p.pattern for p in patterns["MODEL_PATTERNS"]] == [r"\bKM-\d+\b"]
+    assert patterns.quarantined == [("MODEL_PATTERNS", EVIL)]
+
+    registry.release(EVIL)
+    assert [p.pattern for p in registry.current()["MODEL_PATTERNS"]] == [r"\bKM-\d+\b", EVIL]
+
+
+def test_quarantine_file_is_shared_between_registries(tmp_path):
+    source = tmp_path / "custom_patterns.py"
+    _write(source, [r"\bKM-\d+\b", EVIL], 1_000_000_000)
+    quarantine = tmp_path / "pattern_quarantine.json"
+    first, second = PatternRegistry(source, quarantine_path=quarantine), PatternRegistry(source, quarantine_path=quarantine)
+    fingerprint = second.current().fingerprint
+
+    first.quarantine(EVIL, "QA_1")
+    assert [p.pattern for p in second.current()["MODEL_PATTERNS"]] == [r"\bKM-\d+\b"]
+    assert second.current().fingerprint != fingerprint
+    second.release(EVIL)
+    assert first.quarantined() == {}
+    assert first.current().fingerprint == fingerprint
+
+
+@pytest.mark.parametrize("pattern, text", [
+    (EVIL, "a" * 40 + "!"),
+    (r"(a+)+$", "a" * 40 + "!"),
+    (r"(\w+\s?)+$", "word " * 30 + "!"),
+    (r"\d+\s*\d+\s*\d+x", "1" * 5000),
+])
+def test_guarded_findall_stops_catastrophic_backtracking(pattern, text):
+    compiled = pattern_registry.compile_pattern(pattern)
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        pattern_registry.guarded_findall(compiled, text, timeout=0.2)
+    assert time.perf_counter() - start < 0.2 + 1.0
+    assert pattern_registry.guarded_findall(compiled, "aaa", timeout=0.2) == compiled.findall("aaa")
+
+
+def test_user_patterns_are_time_limited_and_built_in_ones_never_quarantined(tmp_path, monkeypatch):
+    monkeypatch.setattr(pattern_registry.config, "BUILTIN_PATTERNS", {"MODEL_PATTERNS": [r"(\w+\s?)+KM"]})
+    source = tmp_path / "custom_patterns.py"
+    _write(source, [r"(\w+\s?)+KM", r"\bKM-\d+\b", EVIL], 1_000_000_000)
+    registry = PatternRegistry(source, quarantine_path=tmp_path / "pattern_quarantine.json")
+
+    assert {p.pattern for p in registry.current().guarded} == {r"\bKM-\d+\b", EVIL}
+    registry.quarantine(r"(\w+\s?)+KM", "QA_1")
+    assert registry.quarantined() == {}
+    assert len(registry.current()["MODEL_PATTERNS"]) == 3
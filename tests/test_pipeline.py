@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import WorkItem, bounded, ordered_map
+
+
+def test_bounded_applies_backpressure():
+    produced = []
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    stream = bounded(source(), maxsize=2)
+    assert next(stream) == 0
+    time.sleep(0.3)
+    # One item taken, two queued and one blocked in put().
+    assert len(produced) <= 4
+    assert list(stream) == list(range(1, 20))
+
+
+def test_bounded_reraises_stage_errors():
+    def failing():
+        yield 1
+        raise ValueError("stage broke")
+
+    stream = bounded(failing())
+    assert next(stream) == 1
+    try:
+        next(stream)
+    except ValueError as e:
+        assert "stage broke" in str(e)
+    else:
+        raise AssertionError("expected the stage error")
+
+
+def test_ordered_map_keeps_input_order_with_executor():
+    def slow_square(x):
+        time.sleep(0.01 * (5 - x))
+        return x * x
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = [f.result() for _, f in ordered_map(slow_square, range(5), executor, window=4)]
+    assert results == [0, 1, 4, 9, 16]
+
+
+def test_ordered_map_passes_skipped_items_through():
+    calls = []
+    items = [WorkItem(index=i, path=None, rel_path=str(i)) for i in range(3)]
+    items[1].row = {"cached": True}
+    out = [f.result() for _, f in ordered_map(calls.append, items, skip=lambda i: i.row is not None)]
+    assert out[1] is items[1]
+    assert [i.index for i in calls] == [0, 2]
+
+
+def test_ordered_map_stops_pulling_when_window_is_full():
+    pulled = []
+    release = threading.Event()
+
+    def source():
+        for i in range(10):
+            pulled.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        stream = ordered_map(lambda x: release.wait(), source(), executor, window=3)
+        release.set()
+        next(stream)
+        assert len(pulled) == 3
+        stream.close()
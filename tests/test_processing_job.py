@@ -0,0 +1,399 @@
+import collections
+import queue
+import sys
+import threading
+import types
+
+import pytest
+
+from tests.openpyxl_stub import ensure_openpyxl_stub
+
+# ruff: noqa: E402
+
+ensure_openpyxl_stub()
+sys.modules.setdefault("pandas", types.ModuleType("pandas"))
+fake_ocr_utils = sys.modules.setdefault("ocr_utils", types.ModuleType("ocr_utils"))
+_ocr_defaults = {
+    "MIN_TEXT_QUALITY": 0.5,
+    "OCR_LOW_DPI": 150,
+    "ExtractedText": collections.namedtuple("ExtractedText", "text page_sources page_quality", defaults=(None,)),
+    "extract_text_with_sources": lambda p, stream=None, **kwargs: None,
+    "get_extraction_settings": dict,
+    "get_tesseract_info": lambda: None,
+    "seed_tesseract_info": lambda info: None,
+    "iter_pdf_pages": lambda p, stream=None, **kwargs: iter(()),
+    "ocr_regions": lambda p, regions, **kwargs: None,
+}
+for _name, _value in _ocr_defaults.items():
+    if not hasattr(fake_ocr_utils, _name):
+        setattr(fake_ocr_utils, _name, _value)
+# Other test modules install a bare processing_engine stub; load the real one.
+if not getattr(sys.modules.get("processing_engine"), "__file__", None):
+    sys.modules.pop("processing_engine", None)
+
+import processing_engine
+
+
+class FakeGenerator:
+    reports = []
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = []
+
+    def open(self):
+        pass
+
+    def add_row(self, row):
+        self.rows.append(row)
+
+    def close(self):
+        FakeGenerator.reports.append(self.rows)
+
+    def abort(self):
+        pass
+
+
+def fake_harvest(text, qa_number, **kwargs):
+    return {"qa_number": qa_number, "models": [text] if text != "none" else []}
+
+
+def _run_job(tmp_path, monkeypatch, harvest=fake_harvest, **extra):
+    monkeypatch.setattr(processing_engine, "harvest_all_data", harvest)
+    monkeypatch.setattr(processing_engine, "ExcelGenerator", FakeGenerator)
+    FakeGenerator.reports.clear()
+    job = {
+        "input_path": str(tmp_path / "docs"),
+        "excel_path": str(tmp_path / "base.xlsx"),
+        "output_dir": str(tmp_path / "out"),
+        **extra,
+    }
+    q = queue.Queue()
+    processing_engine.run_processing_job(job, q, threading.Event(), threading.Event())
+    msgs = []
+    while not q.empty():
+        msgs.append(q.get())
+    return msgs
+
+
+def _make_docs(tmp_path, count):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(count):
+        (docs / f"QA_{i:03d}.txt").write_text("none" if i % 3 == 0 else f"KM-{i}")
+
+
+def test_serial_job_flags_files_without_models(tmp_path, monkeypatch):
+    _make_docs(tmp_path, 4)
+    msgs = _run_job(tmp_path, monkeypatch)
+    rows = FakeGenerator.reports[0]
+    assert [r["status"] for r in rows] == ["Needs Review", "Pass", "Pass", "Needs Review"]
+    assert (tmp_path / "out" / "needs_review" / "QA_000.txt").exists()
+    assert msgs[-1] == {"type": "finish", "status": "Complete"}
+
+
+def test_parallel_job_keeps_source_order(tmp_path, monkeypatch):
+    _make_docs(tmp_path, 12)
+    msgs = _run_job(tmp_path, monkeypatch, max_workers=3)
+    rows = FakeGenerator.reports[0]
+    assert [r["qa_number"] for r in rows] == sorted(r["qa_number"] for r in rows)
+    assert len(rows) == 12
+    assert sum(m["type"] == "status" for m in msgs) == 12
+
+
+def test_cancelled_job_writes_no_report(tmp_path, monkeypatch):
+    _make_docs(tmp_path, 3)
+    monkeypatch.setattr(processing_engine, "harvest_all_data", fake_harvest)
+    monkeypatch.setattr(processing_engine, "ExcelGenerator", FakeGenerator)
+    FakeGenerator.reports.clear()
+    cancel = threading.Event()
+    cancel.set()
+    q = queue.Queue()
+    job = {"input_path": str(tmp_path / "docs"), "excel_path": "base.xlsx", "output_dir": str(tmp_path / "out"), "max_workers": 2}
+    processing_engine.run_processing_job(job, q, cancel, threading.Event())
+    assert FakeGenerator.reports == []
+
+
+def test_pdf_text_is_served_from_cache_on_second_run(tmp_path, monkeypatch):
+    from cache_utils import DiskCache
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "QA_1.pdf").write_bytes(b"%PDF-1.4 one")
+    calls = []
+
+    def fake_extract(path, stream=None, **kwargs):
+        calls.append(path)
+        return processing_engine.ExtractedText("KM-1", ["text"])
+
+    cache = DiskCache(tmp_path / "cache", max_bytes=10_000)
+    monkeypatch.setattr(processing_engine, "extract_text_with_sources", fake_extract)
+    monkeypatch.setattr(processing_engine, "get_extraction_cache", lambda: cache)
+    _run_job(tmp_path, monkeypatch)
+    msgs = _run_job(tmp_path, monkeypatch)
+    assert len(calls) == 1
+    assert FakeGenerator.reports[0][0]["models"] == ["KM-1"]
+    assert any("1 hits, 0 misses" in m.get("msg", "") for m in msgs)
+
+
+def test_adaptive_dpi_is_off_by_default_and_part_of_the_cache_key(tmp_path, monkeypatch):
+    from cache_utils import DiskCache
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "QA_1.pdf").write_bytes(b"%PDF-1.4 one")
+    calls = []
+
+    def fake_extract(path, stream=None, **kwargs):
+        calls.append(kwargs["adaptive_dpi"])
+        return processing_engine.ExtractedText("KM-1", ["ocr"])
+
+    cache = DiskCache(tmp_path / "cache", max_bytes=10_000)
+    monkeypatch.setattr(processing_engine, "extract_text_with_sources", fake_extract)
+    monkeypatch.setattr(processing_engine, "get_extraction_cache", lambda: cache)
+    _run_job(tmp_path, monkeypatch)
+    _run_job(tmp_path, monkeypatch, adaptive_dpi=True)
+    _run_job(tmp_path, monkeypatch, adaptive_dpi=True)
+    assert calls == [False, True]
+
+
+def test_incremental_run_only_processes_changed_files(tmp_path, monkeypatch):
+    import cache_utils
+
+    monkeypatch.setattr(cache_utils, "CACHE_DIR", tmp_path / "cache")
+    _make_docs(tmp_path, 3)
+    harvested = []
+
+    def counting_harvest(text, qa_number, **kwargs):
+        harvested.append(qa_number)
+        return fake_harvest(text, qa_number)
+
+    _run_job(tmp_path, monkeypatch, incremental=True)
+    (tmp_path / "docs" / "QA_001.txt").write_text("KM-999 changed")
+    _run_job(tmp_path, monkeypatch, harvest=counting_harvest, incremental=True)
+    assert harvested == ["QA_001"]
+    rows = FakeGenerator.reports[0]
+    assert [r["qa_number"] for r in rows] == ["QA_000", "QA_001", "QA_002"]
+    assert rows[1]["models"] == ["KM-999 changed"]
+
+
+def test_incremental_run_survives_files_removed_after_listing(tmp_path, monkeypatch):
+    import cache_utils
+
+    monkeypatch.setattr(cache_utils, "CACHE_DIR", tmp_path / "cache")
+    _make_docs(tmp_path, 3)
+    _run_job(tmp_path, monkeypatch, incremental=True)
+    find_source_files = processing_engine.find_source_files
+
+    def listed_then_removed(job_details, review_files_dir):
+        found = find_source_files(job_details, review_files_dir)
+        (tmp_path / "docs" / "QA_001.txt").unlink()
+        return found
+
+    monkeypatch.setattr(processing_engine, "find_source_files", listed_then_removed)
+    msgs = _run_job(tmp_path, monkeypatch, incremental=True)
+    assert msgs[-1] == {"type": "finish", "status": "Complete"}
+    rows = FakeGenerator.reports[0]
+    assert [r["qa_number"] for r in rows] == ["QA_000", "QA_002"]
+
+
+def test_cancelled_incremental_run_keeps_unreached_files_in_manifest(tmp_path, monkeypatch):
+    import cache_utils
+
+    monkeypatch.setattr(cache_utils, "CACHE_DIR", tmp_path / "cache")
+    _make_docs(tmp_path, 100)
+    _run_job(tmp_path, monkeypatch, incremental=True)
+    (tmp_path / "docs" / "QA_001.txt").write_text("KM-999 changed")
+    cancel = threading.Event()
+
+    def cancel_after_first(text, qa_number, **kwargs):
+        cancel.set()
+        return fake_harvest(text, qa_number)
+
+    monkeypatch.setattr(processing_engine, "harvest_all_data", cancel_after_first)
+    job = {"input_path": str(tmp_path / "docs"), "excel_path": str(tmp_path / "base.xlsx"),
+           "output_dir": str(tmp_path / "out"), "incremental": True}
+    processing_engine.run_processing_job(job, queue.Queue(), cancel, threading.Event())
+    harvested = []
+
+    def counting_harvest(text, qa_number, **kwargs):
+        harvested.append(qa_number)
+        return fake_harvest(text, qa_number)
+
+    _run_job(tmp_path, monkeypatch, harvest=counting_harvest, incremental=True)
+    assert harvested == []
+
+
+def test_stages_can_run_on_their_own(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("KM-1")
+    (docs / "b.txt").write_text("none")
+    cancel, pause = threading.Event(), threading.Event()
+    items = list(processing_engine.discover_stage(sorted(docs.iterdir()), docs, cancel, pause))
+    assert [i.rel_path for i in items] == ["a.txt", "b.txt"]
+
+    extracted = list(processing_engine.extract_stage(items, tmp_path, {"use_cache": False}))
+    assert [i.text for i in extracted] == ["KM-1", "none"]
+
+    processing_engine.harvest_all_data, original = fake_harvest, processing_engine.harvest_all_data
+    try:
+        harvested = list(processing_engine.harvest_stage(extracted, tmp_path))
+    finally:
+        processing_engine.harvest_all_data = original
+    assert [i.row["status"] for i in harvested] == ["Pass", "Needs Review"]
+    assert (tmp_path / "b.txt").read_text() == "none"
+    assert all(i.text is None for i in harvested)
+
+
+def test_discover_stage_stops_on_cancel(tmp_path):
+    cancel = threading.Event()
+    cancel.set()
+    files = [tmp_path / "a.pdf"]
+    assert list(processing_engine.discover_stage(files, tmp_path, cancel, threading.Event())) == []
+
+
+def test_pdfs_are_opened_from_memory_without_temp_copy(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "QA_1.pdf").write_bytes(b"%PDF-1.4 one")
+    seen = []
+    monkeypatch.setattr(processing_engine, "extract_text_with_sources", lambda path, stream=None, **kwargs: seen.append(stream) or processing_engine.ExtractedText("KM-1", ["text"]))
+    monkeypatch.setattr(processing_engine.shutil, "copy", lambda *a: pytest.fail("unexpected temp copy"))
+    msgs = _run_job(tmp_path, monkeypatch, use_cache=False)
+    assert seen == [b"%PDF-1.4 one"]
+    assert any("Zero-copy reads: 1 PDFs" in m.get("msg", "") for m in msgs)
+
+
+def test_zero_copy_falls_back_to_temp_copy_when_read_fails(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "QA_1.pdf").write_bytes(b"%PDF-1.4 one")
+    seen = []
+
+    def locked_read(self):
+        raise PermissionError("sharing violation")
+
+    monkeypatch.setattr(processing_engine.Path, "read_bytes", locked_read)
+    monkeypatch.setattr(processing_engine, "extract_text_with_sources", lambda path, stream=None, **kwargs: seen.append((path.parent, stream)) or processing_engine.ExtractedText("KM-1", ["text"]))
+    _run_job(tmp_path, monkeypatch, use_cache=False)
+    assert len(seen) == 1
+    assert seen[0][1] is None
+    assert seen[0][0] != docs
+
+
+def test_resume_skips_journaled_files(tmp_path, monkeypatch):
+    from run_state import JobJournal
+
+    _make_docs(tmp_path, 3)
+    report = tmp_path / "out" / "cloned_base.xlsx"
+    journal = JobJournal(processing_engine.journal_path_for(report))
+    journal.record("QA_000.txt", row={"qa_number": "QA_000", "models": ["from journal"], "status": "Pass"})
+    journal.close()
+    harvested = []
+
+    def counting_harvest(text, qa_number, **kwargs):
+        harvested.append(qa_number)
+        return fake_harvest(text, qa_number)
+
+    _run_job(tmp_path, monkeypatch, harvest=counting_harvest, resume=True)
+    assert harvested == ["QA_001", "QA_002"]
+    rows = FakeGenerator.reports[0]
+    assert rows[0]["models"] == ["from journal"]
+    assert [r["qa_number"] for r in rows] == ["QA_000", "QA_001", "QA_002"]
+    assert not processing_engine.journal_path_for(report).exists()
+
+
+def test_resumed_files_are_kept_in_the_manifest(tmp_path, monkeypatch):
+    import cache_utils
+    from run_state import JobJournal
+
+    monkeypatch.setattr(cache_utils, "CACHE_DIR", tmp_path / "cache")
+    _make_docs(tmp_path, 3)
+    journal = JobJournal(processing_engine.journal_path_for(tmp_path / "out" / "cloned_base.xlsx"))
+    journal.record("QA_000.txt", row={"qa_number": "QA_000", "models": ["from journal"], "status": "Pass"})
+    journal.close()
+    _run_job(tmp_path, monkeypatch, resume=True, incremental=True)
+    harvested = []
+
+    def counting_harvest(text, qa_number, **kwargs):
+        harvested.append(qa_number)
+        return fake_harvest(text, qa_number)
+
+    _run_job(tmp_path, monkeypatch, harvest=counting_harvest, incremental=True)
+    assert harvested == []
+    assert FakeGenerator.reports[0][0]["models"] == ["from journal"]
+
+
+def test_cancelled_job_keeps_its_journal(tmp_path, monkeypatch):
+    _make_docs(tmp_path, 2)
+    cancel = threading.Event()
+
+    def cancel_after_first(text, qa_number, **kwargs):
+        cancel.set()
+        return fake_harvest(text, qa_number)
+
+    monkeypatch.setattr(processing_engine, "harvest_all_data", cancel_after_first)
+    monkeypatch.setattr(processing_engine, "ExcelGenerator", FakeGenerator)
+    job = {"input_path": str(tmp_path / "docs"), "excel_path": "base.xlsx", "output_dir": str(tmp_path / "out")}
+    processing_engine.run_processing_job(job, queue.Queue(), cancel, threading.Event())
+    journal_path = processing_engine.journal_path_for(tmp_path / "out" / "cloned_base.xlsx")
+    assert "QA_000.txt" in journal_path.read_text()
+
+
+def test_early_exit_stops_reading_once_required_fields_are_found(tmp_path, monkeypatch):
+    import data_harvesters
+    import pattern_registry
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "QA_1.pdf").write_bytes(b"%PDF-1.4 one")
+    page = collections.namedtuple("PageText", "number text source page_count quality")
+    pulled = []
+
+    def fake_pages(path, stream=None, *args, **kwargs):
+        for n, text in enumerate(["cover", "KM-7 spec", "body", "body"]):
+            pulled.append(n)
+            yield page(n, text, "text", 4, 0.9 - n / 10)
+
+    monkeypatch.setattr(processing_engine, "iter_pdf_pages", fake_pages)
+    monkeypatch.setattr(pattern_registry, "registry", pattern_registry.PatternRegistry.from_patterns({"MODEL_PATTERNS": [r"KM-\d+"]}))
+    monkeypatch.setattr(data_harvesters, "harvest_all_data", lambda text, qa, stats=None: {"qa_number": qa, "models": ["KM-7"] if "KM-7" in text else []})
+    msgs = _run_job(tmp_path, monkeypatch, early_exit=True, required_fields=["models"], use_cache=False)
+    assert pulled == [0, 1]
+    assert FakeGenerator.reports[0][0]["models"] == ["KM-7"]
+    assert FakeGenerator.reports[0][0]["text_quality"] == 0.8
+    assert FakeGenerator.reports[0][0]["text_quality_pages"] == [0.9, 0.8]
+    assert any("read 2 of 4 pages" in m.get("msg", "") for m in msgs)
+    assert any("2 pages skipped in 1 documents" in m.get("msg", "") for m in msgs)
+    # The page checks are reported although the harvest stage has nothing left to do.
+    assert any("Literal prefilter: 1 of 2 pattern runs skipped" in m.get("msg", "") for m in msgs)
+
+
+def _roi_job(tmp_path, monkeypatch, roi_text):
+    import pattern_registry
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "QA_1.pdf").write_bytes(b"%PDF-1.4 one")
+    full = []
+    monkeypatch.setattr(processing_engine, "ocr_regions", lambda path, regions, stream=None, **kwargs: roi_text)
+    monkeypatch.setattr(processing_engine, "extract_text_with_sources",
+                        lambda path, stream=None, **kwargs: full.append(path) or processing_engine.ExtractedText("KM-9 body", ["ocr"]))
+    monkeypatch.setattr(pattern_registry, "registry", pattern_registry.PatternRegistry.from_patterns({"MODEL_PATTERNS": [r"KM-\d+"]}))
+    msgs = _run_job(tmp_path, monkeypatch, roi_ocr=True, required_fields=["models"], use_cache=False)
+    return msgs, full
+
+
+def test_roi_ocr_skips_full_page_ocr_when_header_has_required_fields(tmp_path, monkeypatch):
+    msgs, full = _roi_job(tmp_path, monkeypatch, "KM-3 header")
+    assert full == []
+    assert FakeGenerator.reports[0][0]["models"] == ["KM-3 header"]
+    assert any("1 scanned PDFs harvested from their header regions, 0 needed" in m.get("msg", "") for m in msgs)
+
+
+def test_roi_ocr_falls_back_to_full_extraction(tmp_path, monkeypatch):
+    msgs, full = _roi_job(tmp_path, monkeypatch, "no fields here")
+    assert len(full) == 1
+    assert FakeGenerator.reports[0][0]["models"] == ["KM-9 body"]
+    assert any("1 needed full-page OCR" in m.get("msg", "") for m in msgs)
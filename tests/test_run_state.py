@@ -9,3 +9,21 @@ def test_increment_run_count(tmp_path, monkeypatch):
     assert temp_file.exists()
     assert run_state.get_run_count() == 1
 
+
+
+def test_job_journal_resume_skips_torn_lines(tmp_path):
+    path = tmp_path / 'job.journal.jsonl'
+    journal = run_state.JobJournal(path)
+    journal.record('a.pdf', row={'qa_number': 'a'})
+    journal.record('b.pdf', error='boom')
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"path": "c.pdf", "sta')
+
+    resumed = run_state.JobJournal(path, resume=True)
+    assert resumed.completed_row('a.pdf') == {'qa_number': 'a'}
+    assert resumed.completed_row('b.pdf') is None
+    assert resumed.completed_row('c.pdf') is None
+    resumed.record('b.pdf', row={'qa_number': 'b'})
+    resumed.close(delete=True)
+    assert not path.exists()
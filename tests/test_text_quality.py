@@ -0,0 +1,31 @@
+from text_quality import score_text
+
+BULLETIN = (
+    "Service Bulletin QA-2345 Revision 2. Models: TASKalfa 3554ci, 4054ci. "
+    "Problem: paper jam occurs in the fuser unit when printing envelopes. "
+    "Corrective action: replace the fuser (part 302NL93050) and update the firmware."
+)
+
+
+def _shift(text, by=3):
+    return "".join(chr((ord(c) - 97 + by) % 26 + 97) if c.islower() else c for c in text)
+
+
+def test_clean_text_scores_high():
+    assert score_text(BULLETIN).score > 0.9
+    parts = "KM-2540 302LV94010 2LV06080 303LV94060 KM-3040 302LV93030 TASKalfa 3554ci 302NL93050"
+    assert score_text(parts).score > 0.9
+
+
+def test_junk_text_layers_score_low():
+    assert score_text(_shift(BULLETIN)).lexical < 0.5
+    assert score_text(_shift(BULLETIN)).score < 0.5
+    assert score_text("�� ��� " * 20).score < 0.5
+    assert score_text("!\"#$%&'()*+,-./ :;<=>?@ 12 " * 10).score < 0.5
+    assert score_text("   ").score == 0.0
+
+
+def test_other_scripts_are_not_judged_lexically():
+    quality = score_text("用紙詰まりが発生した場合は定着ユニットを交換してください。" * 3)
+    assert quality.lexical == 1.0
+    assert quality.score > 0.5
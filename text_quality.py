@@ -0,0 +1,108 @@
+# text_quality.py
+# Scores how trustworthy a PDF text layer is, so junk layers can be OCR'd.
+import re
+import string
+from typing import NamedTuple
+
+# Letters and digits should make up at least this share of the non-space
+# characters; glyph-ID noise and mojibake are mostly symbols.
+MIN_ALNUM_RATIO = 0.6
+# Tokens longer than this are treated as run-together noise, and at least
+# TOKEN_SHAPE_TARGET of the tokens should be 2..MAX_TOKEN_LENGTH long.
+MAX_TOKEN_LENGTH = 25
+TOKEN_SHAPE_TARGET = 0.7
+# Share of alphabetic tokens that are common words at which the dictionary
+# check is fully satisfied. Technical bulletins are dense with model and
+# part numbers, so this is far below what running prose reaches.
+DICTIONARY_TARGET = 0.1
+# Vowels among Latin letters: natural text in the languages of the bulletins
+# sits inside this range, shifted-glyph text (e.g. "Wkh vhuylfh") far below.
+VOWEL_RANGE = (0.3, 0.6)
+VOWEL_MARGIN = 0.1
+# The lexical check only applies when the plain words of a text have at least
+# this many Latin letters and they make up most of their letters.
+MIN_LATIN_LETTERS = 20
+
+# Badly shaped tokens alone cost at most this share of the score; text with
+# no spaces (e.g. Japanese) or letter-spaced headings can still be clean.
+TOKEN_WEIGHT = 0.2
+
+COMMON_WORDS = frozenset("""
+a about after all also an and any are as at be been before but by can check
+copy date do does each for from has have if in into is it its may more must
+new no not of on one or other our out page please print printer product see
+service set should so such that the their then there these this to two up
+use used using was we when which will with without you your
+model models machine part parts serial number revision issue issued bulletin
+information problem cause corrective action procedure replace replaced
+firmware version unit paper toner drum fuser feeder tray error code document
+der die das und ist nicht mit von für auf den des im zu ein eine
+le la les et est pour dans des une sur pas avec du
+el los las y en para con por una del se
+il di che per non con una gli
+""".split())
+
+_MOJIBAKE = re.compile("[ÂÃâ][\u0080-¿€™Œœ‘-„]")
+_ORDINARY_SYMBOLS = frozenset(string.punctuation + "‘’“”–—•°©®")
+_VOWELS = frozenset("aeiouyAEIOUYàâäéèêëîïôöùûüÀÂÄÉÈÊËÎÏÔÖÙÛÜáíóúÁÍÓÚ")
+_WORD_EDGE = string.punctuation + "‘’“”"
+
+
+class TextQuality(NamedTuple):
+    """A quality score in 0..1 plus the checks it is made of (each 0..1)."""
+    score: float
+    printable: float
+    alnum: float
+    tokens: float
+    lexical: float
+
+
+def _ramp(value: float, low: float, high: float) -> float:
+    """0 at or below low, 1 at or above high, linear in between."""
+    if high <= low:
+        return 1.0 if value >= high else 0.0
+    return min(1.0, max(0.0, (value - low) / (high - low)))
+
+
+def _vowel_score(latin_letters: list) -> float:
+    vowels = sum(1 for ch in latin_letters if ch in _VOWELS) / len(latin_letters)
+    low, high = VOWEL_RANGE
+    return min(_ramp(vowels, low - VOWEL_MARGIN, low), 1.0 - _ramp(vowels, high, high + VOWEL_MARGIN))
+
+
+def score_text(text: str) -> TextQuality:
+    """
+    Scores a text layer from 0 (junk) to 1 (clean): the weakest of the
+    printable-character, letter-and-digit and lexical checks, lowered a
+    little when the token lengths look wrong. The lexical check looks at the
+    plain words and passes on common words or a natural vowel balance;
+    words in other scripts, and pages of codes and numbers, pass it.
+    """
+    if not text.strip():
+        return TextQuality(0.0, 0.0, 0.0, 0.0, 0.0)
+
+    printable = sum(1 for ch in text if (ch.isprintable() or ch.isspace()) and ch != "�") / len(text)
+    visible = [ch for ch in text if not ch.isspace()]
+    bad = 2 * len(_MOJIBAKE.findall(text))
+    alnum_count = sum(1 for ch in visible if ch.isalnum())
+    symbol_count = sum(1 for ch in visible if ch in _ORDINARY_SYMBOLS)
+    alnum = _ramp(max(alnum_count - bad, 0) / len(visible), 0.0, MIN_ALNUM_RATIO)
+    if symbol_count + alnum_count < len(visible):
+        alnum *= (symbol_count + alnum_count) / len(visible)
+
+    tokens = text.split()
+    well_formed = sum(1 for token in tokens if 2 <= len(token) <= MAX_TOKEN_LENGTH)
+    token_shape = _ramp(well_formed / len(tokens), 0.0, TOKEN_SHAPE_TARGET)
+
+    # Only plain words are judged lexically; model and part codes are not words.
+    words = [w for w in (token.strip(_WORD_EDGE).lower() for token in tokens) if w.isalpha() and len(w) >= 2]
+    latin = [ch for w in words for ch in w if ch.isascii() or ch in _VOWELS]
+    letters = sum(len(w) for w in words)
+    if len(latin) < MIN_LATIN_LETTERS or len(latin) * 2 < letters:
+        lexical = 1.0
+    else:
+        dictionary = sum(1 for w in words if w in COMMON_WORDS) / len(words)
+        lexical = max(_ramp(dictionary, 0.0, DICTIONARY_TARGET), _vowel_score(latin))
+
+    score = min(printable, alnum, lexical) * (1.0 - TOKEN_WEIGHT + TOKEN_WEIGHT * token_shape)
+    return TextQuality(*(round(value, 3) for value in (score, printable, alnum, token_shape, lexical)))